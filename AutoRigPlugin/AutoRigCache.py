@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import argparse
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from AutoRigMatch import get_plug, iter_frames
+
+
+# En-tête binaire : signature + taille de l'en-tête JSON, données alignées sur 64 octets
+MAGIC = b"ARCACHE1"
+ALIGNMENT = 64
+
+# Canaux stockés pour chaque joint (unités internes : cm / radians)
+CHANNELS = [
+    "translateX", "translateY", "translateZ",
+    "rotateX", "rotateY", "rotateZ",
+    "scaleX", "scaleY", "scaleZ",
+]
+
+# Callbacks de lecture actifs, par racine de squelette
+_ATTACHED = {}
+
+
+###############################
+############################# Lecture / écriture du fichier
+###############################
+
+
+def strip_namespace(name):
+    """Retire le namespace d'un nom de node."""
+    return name.split(":")[-1]
+
+
+def get_deform_joints(pattern="D_*", namespace=""):
+    """
+    Retourne les joints de déformation d'un personnage triés (parents avant enfants).
+
+    :param pattern: Motif des joints, sans namespace
+    :param namespace: Namespace du personnage ("" pour la scène courante)
+    :return: (chemins complets des joints, noms sans namespace, index du parent de chacun ou -1)
+    """
+    prefix = f"{namespace}:" if namespace else ""
+    long_names = cmds.ls(f"{prefix}{pattern}", type="joint", long=True) or []
+    long_names.sort(key=lambda n: n.count("|"))
+
+    # Le parent est cherché par chemin complet : deux joints peuvent porter le même nom court
+    index = {long_name: i for i, long_name in enumerate(long_names)}
+    parents = [index.get(long_name.rsplit("|", 1)[0], -1) for long_name in long_names]
+    names = [strip_namespace(n.split("|")[-1]) for n in long_names]
+
+    return long_names, names, parents
+
+
+def write_header(file_obj, header):
+    """Écrit la signature et l'en-tête JSON, puis retourne l'offset (aligné) des données."""
+    header_bytes = json.dumps(header).encode("utf-8")
+    file_obj.write(MAGIC)
+    file_obj.write(struct.pack("<Q", len(header_bytes)))
+    file_obj.write(header_bytes)
+
+    offset = file_obj.tell()
+    padding = (-offset) % ALIGNMENT
+    file_obj.write(b"\0" * padding)
+    return offset + padding
+
+
+def load_cache(path):
+    """
+    Ouvre un cache sans le charger en mémoire.
+
+    :param path: Chemin du fichier cache
+    :return: (en-tête, np.memmap en lecture seule de forme (frames, joints, canaux))
+    """
+    with open(path, "rb") as file_obj:
+        if file_obj.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas un cache AutoRig valide.")
+        size = struct.unpack("<Q", file_obj.read(8))[0]
+        header = json.loads(file_obj.read(size).decode("utf-8"))
+        offset = file_obj.tell() + (-file_obj.tell()) % ALIGNMENT
+
+    data = np.memmap(path, dtype=np.float32, mode="r", offset=offset, shape=tuple(header["shape"]))
+    return header, data
+
+
+def bake_caches(paths, start=None, end=None, pattern="D_*"):
+    """
+    Bake les transformations des joints de déformation de plusieurs personnages dans des caches
+    mappés en mémoire, en une seule passe sur la plage : chaque frame est évaluée une seule fois
+    pour tous les personnages et écrite directement dans les fichiers.
+
+    Le temps de la scène est réellement déplacé : en mode IK, les rotations des `D_*` viennent
+    du solveur IK, qui n'est pas recalculé dans un MDGContext (voir `iter_frames`).
+    Les noms sont enregistrés sans namespace : un cache peut être relu sur n'importe quel personnage.
+
+    :param paths: Dictionnaire {namespace du personnage ("" pour la scène courante): chemin du cache}
+    :param start: Première frame (par défaut, début du time slider)
+    :param end: Dernière frame (par défaut, fin du time slider)
+    :param pattern: Motif des joints à exporter
+    :return: Dictionnaire {namespace: chemin du cache, ou None si aucun joint n'a été trouvé}
+    """
+    if start is None:
+        start = cmds.playbackOptions(q=True, minTime=True)
+    if end is None:
+        end = cmds.playbackOptions(q=True, maxTime=True)
+    frames = list(range(int(start), int(end) + 1))
+
+    results, targets = {}, []
+    for namespace, path in paths.items():
+        nodes, joints, parents = get_deform_joints(pattern, namespace)
+        if not joints:
+            cmds.warning(f"Aucun joint de déformation '{pattern}' trouvé (namespace '{namespace}').")
+            results[namespace] = None
+            continue
+
+        header = {
+            "version": 1,
+            "joints": joints,
+            "parents": parents,
+            "joint_orient": [[cmds.getAttr(f"{n}.jointOrient{a}") for a in "XYZ"] for n in nodes],
+            "rotate_order": [cmds.getAttr(f"{n}.rotateOrder") for n in nodes],
+            "channels": CHANNELS,
+            "start": frames[0],
+            "end": frames[-1],
+            "time_unit": cmds.currentUnit(q=True, time=True),
+            "shape": [len(frames), len(joints), len(CHANNELS)],
+        }
+
+        with open(path, "wb") as file_obj:
+            offset = write_header(file_obj, header)
+
+        data = np.memmap(path, dtype=np.float32, mode="r+", offset=offset, shape=tuple(header["shape"]))
+        plugs = [get_plug(f"{n}.{c}") for n in nodes for c in CHANNELS]
+        targets.append((path, data, plugs))
+        results[namespace] = path
+
+    if targets:
+        for f_index, _ in iter_frames(frames, step_time=True):
+            for _, data, plugs in targets:
+                row = [plug.asDouble() for plug in plugs]
+                data[f_index] = np.asarray(row, dtype=np.float32).reshape(data.shape[1:])
+
+    for path, data, _ in targets:
+        data.flush()
+        print(f">> Cache écrit : {path} ({data.shape[0]} frames, {data.shape[1]} joints).")
+    del targets
+
+    return results
+
+
+def bake_cache(path, start=None, end=None, pattern="D_*", namespace=""):
+    """
+    Bake les joints de déformation d'un seul personnage (voir `bake_caches`).
+
+    :param namespace: Namespace du personnage ("" pour la scène courante)
+    :return: Chemin du cache, ou None si aucun joint n'a été trouvé
+    """
+    return bake_caches({namespace: path}, start, end, pattern)[namespace]
+
+
+###############################
+############################# Lecture sur squelette nu
+###############################
+
+
+def build_skeleton(header, namespace=""):
+    """
+    Crée un squelette nu (joints seuls, aucun node de rig) correspondant à l'en-tête du cache.
+
+    :return: Liste des joints créés, dans l'ordre du cache
+    """
+    prefix = f"{namespace}:" if namespace else ""
+    if namespace and not cmds.namespace(exists=namespace):
+        cmds.namespace(add=namespace)
+
+    created = []
+    for name, parent, orient, order in zip(header["joints"], header["parents"],
+                                           header["joint_orient"], header["rotate_order"]):
+        cmds.select(clear=True)
+        j = cmds.joint(name=f"{prefix}{strip_namespace(name)}")
+        if parent >= 0:
+            j = cmds.parent(j, created[parent])[0]
+        cmds.setAttr(f"{j}.jointOrient", *orient)
+        cmds.setAttr(f"{j}.rotateOrder", order)
+        created.append(j)
+
+    cmds.select(clear=True)
+    return created
+
+
+def get_time_unit(name):
+    """
+    Convertit une unité de temps de `cmds.currentUnit` (`film`, `ntsc`, `30fps`...) en unité MTime.
+
+    :return: Unité MTime, ou None si l'unité est inconnue
+    """
+    units = {
+        "game": om.MTime.kGames, "film": om.MTime.kFilm, "pal": om.MTime.kPALFrame,
+        "ntsc": om.MTime.kNTSCFrame, "show": om.MTime.kShowScan, "palf": om.MTime.kPALField,
+        "ntscf": om.MTime.kNTSCField, "hour": om.MTime.kHours, "min": om.MTime.kMinutes,
+        "sec": om.MTime.kSeconds, "millisec": om.MTime.kMilliseconds,
+    }
+    if name in units:
+        return units[name]
+    if name.endswith("fps"):
+        return getattr(om.MTime, f"k{name[:-3].replace('.', '_')}FPS", None)
+    return None
+
+
+def attach_cache(path, namespace=""):
+    """
+    Pilote un squelette nu depuis un cache : à chaque changement de frame, la ligne
+    correspondante est lue dans le fichier mappé et appliquée aux joints.
+    Le squelette est créé s'il n'existe pas encore.
+
+    Le callback n'existe que dans la session courante : il n'est pas enregistré avec la scène
+    et ne s'exécute ni en lecture mise en cache (cached playback), ni lors d'une évaluation
+    par MDGContext, ni en rendu batch. Pour le lighting, baker le squelette en clés.
+
+    :return: Racine du squelette piloté
+    """
+    header, data = load_cache(path)
+    prefix = f"{namespace}:" if namespace else ""
+    joints = [f"{prefix}{strip_namespace(name)}" for name in header["joints"]]
+
+    if not all(cmds.objExists(j) for j in joints):
+        joints = build_skeleton(header, namespace)
+
+    root = joints[0]
+    detach_cache(root)
+
+    plugs = [get_plug(f"{j}.{c}") for j in joints for c in header["channels"]]
+    start, end = header["start"], header["end"]
+
+    # Les frames du cache sont dans l'unité de temps de la scène bakée
+    unit = get_time_unit(header.get("time_unit", ""))
+    if unit is None:
+        cmds.warning(f"Unité de temps du cache inconnue ({header.get('time_unit')}), unité de la scène utilisée.")
+        unit = om.MTime.uiUnit()
+
+    def on_time_changed(time, client_data):
+        index = int(round(min(max(time.asUnits(unit), start), end) - start))
+        for plug, value in zip(plugs, data[index].ravel()):
+            plug.setDouble(float(value))
+
+    _ATTACHED[root] = (om.MDGMessage.addTimeChangeCallback(on_time_changed), data)
+    on_time_changed(om.MAnimControl.currentTime(), None)
+
+    print(f">> Cache {path} attaché à {root}.")
+    return root
+
+
+def detach_cache(root):
+    """Retire le callback de lecture d'un squelette piloté par un cache."""
+    attached = _ATTACHED.pop(root, None)
+    if attached:
+        om.MMessage.removeCallback(attached[0])
+
+
+###############################
+############################# Bake en parallèle (mayapy)
+###############################
+
+
+def get_mayapy():
+    """
+    Retourne le chemin de l'interpréteur mayapy de l'installation courante, cherché à côté
+    de l'exécutable de Maya (`sys.executable`) puis dans `MAYA_LOCATION`.
+    """
+    executable = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+    bin_dir = os.path.dirname(os.path.abspath(sys.executable))
+    candidates = [
+        os.path.join(bin_dir, executable),
+        # macOS : Maya.app/Contents/MacOS/Maya -> Maya.app/Contents/bin/mayapy
+        os.path.join(os.path.dirname(bin_dir), "bin", executable),
+    ]
+    if os.environ.get("MAYA_LOCATION"):
+        candidates.append(os.path.join(os.environ["MAYA_LOCATION"], "bin", executable))
+
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    cmds.error(f"Interpréteur mayapy introuvable (cherché dans : {', '.join(candidates)}).")
+
+
+def get_cache_path(output_dir, scene, namespace=""):
+    """Chemin du cache d'un personnage : `<scène>.arc`, ou `<scène>_<namespace>.arc`."""
+    name = os.path.splitext(os.path.basename(scene))[0]
+    if namespace:
+        name = f"{name}_{namespace.replace(':', '_')}"
+    return os.path.join(output_dir, name + ".arc")
+
+
+def bake_shots(shots, output_dir, workers=4, namespaces=("",)):
+    """
+    Bake plusieurs plans en parallèle, un process mayapy par plan : chaque scène n'est ouverte
+    qu'une fois et tous ses personnages sont bakés dans la même passe.
+
+    :param shots: Liste de chemins de scènes, ou de tuples (scène, début, fin)
+    :param output_dir: Dossier de sortie des caches (voir `get_cache_path`)
+    :param workers: Nombre de process mayapy simultanés
+    :param namespaces: Namespaces des personnages à baker ("" pour un personnage sans namespace)
+    :return: Dictionnaire {(scène, namespace): chemin du cache ou None en cas d'échec}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    mayapy = get_mayapy()
+
+    def run(shot):
+        scene, *frame_range = shot if isinstance(shot, (list, tuple)) else (shot,)
+        outputs = {ns: get_cache_path(output_dir, scene, ns) for ns in namespaces}
+        # Un cache présent après le bake est forcément celui de ce bake
+        for output in outputs.values():
+            if os.path.exists(output):
+                os.remove(output)
+
+        command = [mayapy, os.path.abspath(__file__), scene, output_dir, "--namespaces", *namespaces]
+        if frame_range:
+            command += ["--start", str(frame_range[0]), "--end", str(frame_range[1])]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"Échec du bake de {scene} :\n{result.stderr}")
+        return {(scene, ns): output if os.path.exists(output) else None for ns, output in outputs.items()}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for shot_results in pool.map(run, shots):
+            results.update(shot_results)
+    return results
+
+
+if __name__ == "__main__":
+    # Usage : mayapy AutoRigCache.py scene.ma dossier_sortie [--start debut --end fin] [--namespaces ns1 ns2...]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scene")
+    parser.add_argument("output_dir")
+    parser.add_argument("--start", type=float)
+    parser.add_argument("--end", type=float)
+    parser.add_argument("--namespaces", nargs="*", default=[""])
+    arguments = parser.parse_args()
+
+    import maya.standalone
+    maya.standalone.initialize()
+    try:
+        cmds.file(arguments.scene, open=True, force=True)
+        paths = {ns: get_cache_path(arguments.output_dir, arguments.scene, ns) for ns in arguments.namespaces}
+        if not all(bake_caches(paths, arguments.start, arguments.end).values()):
+            sys.exit(1)
+    finally:
+        maya.standalone.uninitialize()
@@ -1,15 +1,20 @@
 import json
 import maya.cmds as cmds
 
+import AutoRigShapes as ars
+import AutoRigReport as arr
+import AutoRigPlan as arp
+import AutoRigTemplates as art
+
 def realiser(file):
     """
-    Lit un fichier JSON, recrée les objets avec `C_Curve`, puis applique les hiérarchies.
+    Charge un template de guides (nom ou chemin, voir AutoRigTemplates), recrée les objets
+    avec `C_Curve`, puis applique les hiérarchies.
     Effectue ensuite une symétrie sur certains objets spécifiques.
     """
     try:
-        with open(file, 'r') as json_file:
-            data = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        data = art.get_template(file)
+    except (FileNotFoundError, json.JSONDecodeError, ValueError, KeyError) as e:
         cmds.warning(f"Erreur lors de la lecture du fichier : {e}")
         return
 
@@ -34,9 +39,8 @@ def realiser(file):
         created_objects[name] = created_obj  # Stocker l'objet
 
         # Gestion du parentage
-        hierarchy = obj_data.get('hierarchy', [])
-        if hierarchy:
-            parent_name = hierarchy[-1]  # Récupérer le parent immédiat
+        parent_name = obj_data.get('parent')
+        if parent_name:
             parent_relations.append((created_obj, parent_name))
 
     # Étape 2 : Application du parentage une fois que tout est créé
@@ -274,11 +278,80 @@ def Crig_Bp(options):
     """
     Crée un rig Biped en fonction des options passées depuis l'interface utilisateur.
     """
-    
+    return build_rig("biped", options)
+
+
+def Crig_Custom(options):
+    """
+    Crée un rig à partir d'une description choisie par l'utilisateur (`options["rig_file"]`).
+    """
+    rig_file = options.get("rig_file")
+    if not rig_file:
+        cmds.warning("Aucune description de rig fournie (option 'rig_file').")
+        return None
+    return build_rig(rig_file, options)
+
+
+def build_rig(rig, options):
+    """
+    Compile la description d'un rig en plan de construction, puis l'exécute.
+
+    :param rig: Nom d'une description livrée (`biped`...) ou chemin d'un fichier JSON
+    :param options: Options de l'interface utilisateur (`dry_run` affiche le plan sans construire)
+    :return: Résultats des étapes du plan, ou le plan lui-même en dry run
+    """
+    description = arp.load_description(rig)
+    if not description:
+        return None
+
+    squash_enabled = options.get("squash", False)
+    squash_parts = options.get("squash_parts", [])
+
+    bendable_enabled = options.get("bendable", False)
+    bendable_parts = options.get("bendable_parts", [])
+
+    print(f"==> Construction du Rig {description['name']} avec les paramètres suivants :")
+    print(f"  • Squash: {squash_enabled} → {squash_parts}")
+    print(f"  • Bendable: {bendable_enabled} → {bendable_parts}")
+
+    plan = arp.compile_plan(description)
+    if options.get("dry_run", False):
+        arp.describe_plan(plan)
+        return plan
+
+    results = arp.execute_plan(plan)
+    if results is None:
+        return None
+
+    # Réappliquer les formes de contrôleurs sauvegardées avant la reconstruction
+    shapes_file = options.get("shapes_file")
+    if shapes_file:
+        ars.restore_shapes(shapes_file)
+
+    # Lier les nodes construits à leurs guides pour les mises à jour incrémentales
+    # (import local : AutoRigLiveLink dépend d'AutoRigMatch, qui importe ce module)
+    if options.get("live_link", False):
+        import AutoRigLiveLink as arl
+        arl.record_links(plan, results)
+
+    # Contrôler le nombre de nodes produits par rapport au budget
+    if options.get("budget", False):
+        report = arr.analyse_rig()
+        for violation in arr.check_budget(report, arr.load_budget(options.get("budget_file"))):
+            cmds.warning(f"Budget de nodes dépassé : {violation}")
+
+    print(f"\n✅ Rig {description['name']} généré avec succès.")
+    return results
+
+
+def create_world_control():
+    """
+    Crée le contrôleur global `C_World` et ses attributs de switch et d'affichage.
+    """
     # Création du contrôleur global avec une courbe carré arrondi
     if not cmds.objExists("C_World"):
         # Créer un cercle de base pour les bords arrondis
-        world_ctrl = cmds.circle(name="C_World", normal=[0, 1, 0], radius=5, sections=8)[0]
+        world_ctrl = cmds.circle(name="C_World", normal=[0, 1, 0], radius=5, sections=8, constructionHistory=False)[0]
 
         # Appliquer une couleur rouge
         cmds.setAttr(f"{world_ctrl}.overrideEnabled", 1)
@@ -325,33 +398,8 @@ def Crig_Bp(options):
         cmds.addAttr(world_ctrl, longName="Priority_Display_Controls", at="bool", keyable=True)
 
         print(">> Attributs ajoutés au contrôleur 'C_World'.")
-        
-    squash_enabled = options.get("squash", False)
-    squash_parts = options.get("squash_parts", [])
-
-    bendable_enabled = options.get("bendable", False)
-    bendable_parts = options.get("bendable_parts", [])
-
-    print("==> Construction du Rig Biped avec les paramètres suivants :")
-    print(f"  • Squash: {squash_enabled} → {squash_parts}")
-    print(f"  • Bendable: {bendable_enabled} → {bendable_parts}")
-
-    print(">> Création du bras droit...")
-    create_arm_rig("R")
-    print(">> Création du bras gauche...")
-    create_arm_rig("L")
-
-    print(">> Création de la jambe droite...")
-    create_leg_rig("R")
-    print(">> Création de la jambe gauche...")
-    create_leg_rig("L")
-    
-    # Appliquer les contraintes IK/FK et les switches sur les déformeurs du bras et des jambes
-    apply_constraints_and_switch("Arm_L", "Arm_R")
-    apply_constraints_and_switch("Leg_L", "Leg_R")
-
-    print("\n✅ Rig Biped généré avec succès.")
 
+    return "C_World"
 
 
 def create_arm_rig(side="R"):
@@ -382,15 +430,30 @@ def create_leg_rig(side="R"):
     setup_constraints_and_switch(d_joints, ik_joints, fk_ctrls, ik_ctrl, suffix)
 
 
+# Chaînes de joints par membre (racine -> extrémité)
+LIMB_PARTS = {
+    "Arm": ["Arm", "ForeArm", "Hand"],
+    "Leg": ["Hip", "Knee", "Ankle"],
+}
+
+
+# Transformations des guides lues en amont par un plan de construction (voir AutoRigPlan)
+GUIDE_CACHE = {}
+
+
 def get_guide_position(name):
+    if name in GUIDE_CACHE:
+        return GUIDE_CACHE[name][0]
     return cmds.xform(name, q=True, ws=True, t=True)
 
 def get_guide_rotation(name):
+    if name in GUIDE_CACHE:
+        return GUIDE_CACHE[name][1]
     return cmds.xform(name, q=True, ws=True, ro=True)
 
 
-def create_deform_joints(suffix, limb):
-    names = ["Arm", "ForeArm", "Hand"] if limb == "Arm" else ["Hip", "Knee", "Ankle"]
+def create_deform_joints(suffix, limb, parts=None):
+    names = parts or LIMB_PARTS[limb]
     guides = [f"G_{n}{suffix}" for n in names]
     joints = []
 
@@ -414,8 +477,8 @@ def create_deform_joints(suffix, limb):
 
 
 
-def create_ik_joints(suffix, limb):
-    names = ["Arm", "ForeArm", "Hand"] if limb == "Arm" else ["Hip", "Knee", "Ankle"]
+def create_ik_joints(suffix, limb, parts=None):
+    names = parts or LIMB_PARTS[limb]
     guides = [f"G_{n}{suffix}" for n in names]
     joints = []
 
@@ -438,10 +501,10 @@ def create_ik_joints(suffix, limb):
     return joints
 
 
-def create_pole_vector(suffix, limb):
-    if limb == "Arm":
+def create_pole_vector(suffix, limb, pv_guide=None):
+    if pv_guide is None and limb == "Arm":
         pv_guide = "G_PoleVB_D" if suffix == "_R" else "G_PoleVB_G"
-    else:
+    elif pv_guide is None:
         pv_guide = "G_PoleVJ_D" if suffix == "_R" else "G_PoleVJ_G"
 
     pv_joint = f"Ik_PoleV{suffix}_{limb}"
@@ -488,13 +551,13 @@ def split_deformer_chain(joints):
                     cmds.connectAttr(f"{mult}.outputX", f"{inter_joint}.rotateX", force=True)
 
 
-def create_fk_controls(suffix, limb):
-    parts = ["Arm", "ForeArm", "Hand"] if limb == "Arm" else ["Hip", "Knee", "Ankle"]
+def create_fk_controls(suffix, limb, parts=None):
+    parts = parts or LIMB_PARTS[limb]
     guides = [f"G_{p}{suffix}" for p in parts]
     ctrls = []
 
     for p, g in zip(parts, guides):
-        ctrl = cmds.circle(name=f"C_FK_{p}{suffix}", normal=[1, 0, 0], radius=1.5)[0]
+        ctrl = cmds.circle(name=f"C_FK_{p}{suffix}", normal=[1, 0, 0], radius=1.5, constructionHistory=False)[0]
         cmds.xform(ctrl, ws=True, t=get_guide_position(g), ro=get_guide_rotation(g))
         ctrls.append(ctrl)
 
@@ -505,7 +568,7 @@ def create_fk_controls(suffix, limb):
 
 def create_ik_control(suffix, end_joint_name):
     guide = f"G_{end_joint_name}{suffix}"
-    ctrl = cmds.circle(name=f"C_IK_{end_joint_name}{suffix}", normal=[1, 0, 0], radius=2.0)[0]
+    ctrl = cmds.circle(name=f"C_IK_{end_joint_name}{suffix}", normal=[1, 0, 0], radius=2.0, constructionHistory=False)[0]
     cmds.setAttr(f"{ctrl}.overrideEnabled", 1)
     cmds.setAttr(f"{ctrl}.overrideColor", 13)
     cmds.xform(ctrl, ws=True, t=get_guide_position(guide), ro=get_guide_rotation(guide))
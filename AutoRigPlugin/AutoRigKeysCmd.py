@@ -0,0 +1,84 @@
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+import AutoRigMatch as arm
+
+
+def maya_useNewAPI():
+    """Le plugin utilise l'API Python 2.0."""
+    pass
+
+
+class AddKeysCmd(om.MPxCommand):
+    """
+    Commande `autoRigAddKeys` : écrit les clés préparées par `AutoRigMatch.write_keys`
+    en gardant les modifications des courbes, pour qu'un seul Ctrl+Z les annule.
+    """
+    name = "autoRigAddKeys"
+
+    def __init__(self):
+        super().__init__()
+        self.change = oma.MAnimCurveChange()
+        self.modifier = om.MDGModifier()
+
+    @staticmethod
+    def creator():
+        return AddKeysCmd()
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        arm.add_pending_keys(self.change, self.modifier)
+
+    def undoIt(self):
+        self.change.undoIt()
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+        self.change.redoIt()
+
+
+class DoModifierCmd(om.MPxCommand):
+    """
+    Commande `autoRigDoModifier` : exécute le MDGModifier préparé par `AutoRigMatch.apply_modifier`
+    et le conserve pour l'annulation.
+    """
+    name = "autoRigDoModifier"
+
+    def __init__(self):
+        super().__init__()
+        self.modifier = None
+
+    @staticmethod
+    def creator():
+        return DoModifierCmd()
+
+    def isUndoable(self):
+        return True
+
+    def doIt(self, args):
+        self.modifier = arm._PENDING_MODIFIER[0]
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+
+COMMANDS = (AddKeysCmd, DoModifierCmd)
+
+
+def initializePlugin(plugin):
+    fn = om.MFnPlugin(plugin, "AutoRig")
+    for command in COMMANDS:
+        fn.registerCommand(command.name, command.creator)
+
+
+def uninitializePlugin(plugin):
+    fn = om.MFnPlugin(plugin)
+    for command in COMMANDS:
+        fn.deregisterCommand(command.name)
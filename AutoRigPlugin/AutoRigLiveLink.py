@@ -0,0 +1,205 @@
+import json
+
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+from AutoRigMatch import (get_plug, sample_world_matrices, normalize_rotation, rotation_to_euler,
+                          euler_to_rotation, to_parent_space, apply_modifier)
+
+
+# Node réseau qui conserve les liens guide -> rig dans la scène
+LINK_NODE = "AutoRig_LiveLink"
+
+# Écart minimal (unités de l'interface) pour considérer qu'un guide a bougé
+TOLERANCE = 1e-4
+
+
+###############################
+############################# Enregistrement pendant la construction
+###############################
+
+
+def read_guides(guides):
+    """Lit la position et l'orientation monde des guides (unités de l'interface)."""
+    return {g: [cmds.xform(g, q=True, ws=True, t=True), cmds.xform(g, q=True, ws=True, ro=True)]
+            for g in guides if cmds.objExists(g)}
+
+
+def store(links, snapshot):
+    """Écrit les liens et l'état des guides sur le node réseau de la scène."""
+    if not cmds.objExists(LINK_NODE):
+        cmds.createNode("network", name=LINK_NODE)
+        cmds.addAttr(LINK_NODE, longName="links", dataType="string")
+        cmds.addAttr(LINK_NODE, longName="snapshot", dataType="string")
+    cmds.setAttr(f"{LINK_NODE}.links", json.dumps(links), type="string")
+    cmds.setAttr(f"{LINK_NODE}.snapshot", json.dumps(snapshot), type="string")
+
+
+def load():
+    """Relit les liens et l'état des guides, ou (None, None) si le live link n'a pas été enregistré."""
+    if not cmds.objExists(LINK_NODE):
+        return None, None
+    return (json.loads(cmds.getAttr(f"{LINK_NODE}.links") or "{}"),
+            json.loads(cmds.getAttr(f"{LINK_NODE}.snapshot") or "{}"))
+
+
+def record_links(plan, results):
+    """
+    Enregistre, à partir d'un plan exécuté, de quel(s) guide(s) dérive chaque node du rig :
+    joints (`joint`), contrôleurs (`transform`), pole vectors (`position`) et joints de twist (`twist`).
+
+    :param plan: Plan compilé par AutoRigPlan
+    :param results: Résultats de `execute_plan`
+    :return: Nombre de nodes liés
+    """
+    links = {}
+    for s in plan["steps"]:
+        op, args, result = s["op"], s["args"], results.get(s["id"])
+
+        if op in ("deform_joints", "ik_joints", "fk_controls"):
+            suffix, limb = args[:2]
+            kind = "transform" if op == "fk_controls" else "joint"
+            for node, part in zip(result, plan["chains"][limb]):
+                links[node] = {"kind": kind, "guides": [f"G_{part}{suffix}"]}
+
+        elif op == "ik_control":
+            suffix, end = args
+            links[result] = {"kind": "transform", "guides": [f"G_{end}{suffix}"]}
+
+        elif op == "pole_vector" and result and args[2]:
+            links[result] = {"kind": "position", "guides": [args[2]]}
+
+        elif op == "twist":
+            # Les joints intermédiaires sont répartis entre le guide du joint et celui du suivant
+            d_joints = results[args[0][1:]]
+            for joint, next_joint in zip(d_joints[:-1], d_joints[1:]):
+                mids = sorted(cmds.ls(f"{joint}_Mid_*", type="joint") or [])
+                guides = [links[joint]["guides"][0], links[next_joint]["guides"][0]]
+                for i, mid in enumerate(mids, 1):
+                    links[mid] = {"kind": "twist", "guides": guides, "factor": i / float(len(mids) + 1)}
+
+    guides = sorted({g for link in links.values() for g in link["guides"]})
+    store(links, read_guides(guides))
+    print(f">> Live link : {len(links)} nodes liés à {len(guides)} guides.")
+    return len(links)
+
+
+###############################
+############################# Mise à jour incrémentale
+###############################
+
+
+def get_changed_guides(snapshot, current):
+    """Retourne les guides dont la position ou l'orientation a changé depuis le dernier enregistrement."""
+    changed = set()
+    for guide, (t, ro) in current.items():
+        old = snapshot.get(guide)
+        if old is None or np.abs(np.subtract(t + ro, old[0] + old[1])).max() > TOLERANCE:
+            changed.add(guide)
+    return changed
+
+
+def get_affected_nodes(links, changed):
+    """
+    Nodes à mettre à jour : ceux qui dérivent d'un guide modifié et leurs descendants liés,
+    triés par profondeur DAG (parents avant enfants).
+    """
+    long_names = {n: cmds.ls(n, long=True)[0] for n in links if cmds.objExists(n)}
+    direct = [long_names[n] for n in long_names if set(links[n]["guides"]) & changed]
+
+    affected = {n for n, long_name in long_names.items()
+                if any(long_name == d or long_name.startswith(d + "|") for d in direct)}
+    return sorted(affected, key=lambda n: long_names[n].count("|")), long_names
+
+
+def update_from_guides():
+    """
+    Reporte les modifications des guides sur le rig construit, sans le reconstruire.
+    Seuls les guides modifiés sont traités ; les nouvelles transformations sont calculées
+    avec NumPy dans l'ordre de la hiérarchie, puis écrites en une seule modification du graphe,
+    annulable en un Ctrl+Z avec l'état des guides.
+
+    L'orientation reste portée par le `rotate` des pilotes, comme à la construction : les contrôleurs
+    reçoivent translation et rotation, les joints (`D_*` pilotés par les contrôleurs FK ou la chaîne IK,
+    `Ik_*` résolus par le solveur) leur seule translation, sans correction de `jointOrient`.
+
+    :return: Nombre de nodes mis à jour
+    """
+    links, snapshot = load()
+    if links is None:
+        cmds.warning("Aucun live link enregistré : construire le rig avec l'option 'live_link'.")
+        return 0
+
+    current = read_guides(sorted({g for link in links.values() for g in link["guides"]}))
+    changed = get_changed_guides(snapshot, current)
+    if not changed:
+        print(">> Live link : aucun guide modifié.")
+        return 0
+
+    nodes, long_names = get_affected_nodes(links, changed)
+    if not nodes:
+        snapshot.update({g: current[g] for g in changed})
+        store(links, snapshot)
+        return 0
+
+    # Lecture en une passe de l'état courant
+    frame = [cmds.currentTime(q=True)]
+    world = dict(zip(nodes, sample_world_matrices(nodes, frame)[0]))
+    parent_world = dict(zip(nodes, sample_world_matrices(nodes, frame, "parentMatrix[0]")[0]))
+
+    # Guides convertis en unités internes (cm, radians)
+    linear, angular = om.MDistance.uiToInternal(1.0), om.MAngle.uiToInternal(1.0)
+    guide_t = {g: np.array(v[0]) * linear for g, v in current.items()}
+    guide_r = {g: euler_to_rotation(np.array(v[1]) * angular) for g, v in current.items()}
+
+    new_world, values = {}, {}
+    for node in nodes:
+        link = links[node]
+        parent = long_names[node].rsplit("|", 1)[0].split("|")[-1]
+        p_matrix = new_world.get(parent, parent_world[node])
+        p_rot = normalize_rotation(p_matrix)
+
+        guides = link["guides"]
+        if link["kind"] == "twist":
+            a, b = guide_t[guides[0]], guide_t[guides[1]]
+            position = a + (b - a) * link["factor"]
+            local_rot = normalize_rotation(world[node]) @ normalize_rotation(parent_world[node]).T
+            world_rot = local_rot @ p_rot
+        elif link["kind"] == "position":
+            position = guide_t[guides[0]]
+            world_rot = normalize_rotation(world[node])
+        else:
+            # Orientation du guide : écrite sur les contrôleurs, reproduite au repos par les pilotes des joints
+            position = guide_t[guides[0]]
+            world_rot = guide_r[guides[0]]
+
+        matrix = np.eye(4)
+        matrix[:3, :3] = world_rot
+        matrix[3, :3] = position
+        new_world[node] = matrix
+
+        local_rot = world_rot @ p_rot.T
+        local_t = to_parent_space(position, np.linalg.inv(p_matrix))
+        for axis, v in zip("XYZ", local_t):
+            values[f"{node}.translate{axis}"] = v
+
+        if link["kind"] == "transform":
+            for axis, v in zip("XYZ", rotation_to_euler(local_rot, unwrap=False)):
+                values[f"{node}.rotate{axis}"] = v
+
+    modifier = om.MDGModifier()
+    for plug_name, value in values.items():
+        modifier.newPlugValueDouble(get_plug(plug_name), float(value))
+
+    # Modifications du rig et état des guides dans un seul bloc d'annulation
+    snapshot.update({g: current[g] for g in changed})
+    cmds.undoInfo(openChunk=True, chunkName="AutoRig_LiveLink")
+    try:
+        apply_modifier(modifier)
+        store(links, snapshot)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    print(f">> Live link : {len(changed)} guide(s) modifié(s), {len(nodes)} nodes mis à jour.")
+    return len(nodes)
@@ -0,0 +1,340 @@
+import os
+
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+import AutoRigCore as arc
+
+
+# Plugin des commandes annulables qui écrivent les clés et les valeurs (voir AutoRigKeysCmd)
+KEYS_PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AutoRigKeysCmd.py")
+
+# Clés en attente d'écriture par la commande `autoRigAddKeys` : (MTimeArray, {"node.attr": valeurs})
+_PENDING_KEYS = []
+
+# Modification en attente d'exécution par la commande `autoRigDoModifier`
+_PENDING_MODIFIER = []
+
+###############################
+############################# Échantillonnage des matrices
+###############################
+
+
+def get_plug(plug_name):
+    """Retourne le MPlug correspondant à un nom `node.attr`."""
+    sel = om.MSelectionList()
+    sel.add(plug_name)
+    return sel.getPlug(0)
+
+
+def iter_frames(frames, step_time=False):
+    """
+    Parcourt des frames en rendant chacune active pour la lecture des plugs.
+
+    Par défaut, chaque frame est évaluée via un MDGContext, sans toucher au `currentTime` de la scène.
+    Avec `step_time`, le temps de la scène est réellement déplacé (rafraîchissement de la vue suspendu) :
+    nécessaire dès que les valeurs lues dépendent d'un IK handle, dont le solveur écrit les rotations
+    des joints en effet de bord et ne les recalcule pas dans un MDGContext.
+
+    :return: Générateur de (index, frame)
+    """
+    if not step_time:
+        unit = om.MTime.uiUnit()
+        for index, frame in enumerate(frames):
+            with om.MDGContextGuard(om.MDGContext(om.MTime(frame, unit))):
+                yield index, frame
+        return
+
+    current = cmds.currentTime(q=True)
+    cmds.refresh(suspend=True)
+    try:
+        for index, frame in enumerate(frames):
+            cmds.currentTime(frame, update=True)
+            yield index, frame
+    finally:
+        cmds.currentTime(current, update=True)
+        cmds.refresh(suspend=False)
+
+
+def sample_world_matrices(nodes, frames, attr="worldMatrix[0]", step_time=False):
+    """
+    Lit les matrices monde de plusieurs nodes sur une plage de frames, en une seule passe :
+    chaque frame est évaluée une seule fois et tous les nodes sont lus dans le même état.
+
+    :param nodes: Liste des nodes à lire
+    :param frames: Liste des frames
+    :param attr: Attribut matrice à lire (`worldMatrix[0]`, `parentMatrix[0]`...)
+    :param step_time: Déplace le temps de la scène au lieu d'un MDGContext (nodes pilotés par un IK, voir `iter_frames`)
+    :return: np.ndarray de forme (frames, nodes, 4, 4)
+    """
+    plugs = [get_plug(f"{node}.{attr}") for node in nodes]
+    data = np.empty((len(frames), len(plugs), 4, 4), dtype=np.float64)
+
+    for f_index, _ in iter_frames(frames, step_time):
+        for n_index, plug in enumerate(plugs):
+            matrix = om.MFnMatrixData(plug.asMObject()).matrix()
+            data[f_index, n_index] = [[matrix.getElement(r, c) for c in range(4)] for r in range(4)]
+
+    return data
+
+
+###############################
+############################# Calculs NumPy
+###############################
+
+
+def normalize_rotation(matrices):
+    """Retire l'échelle d'un tableau de matrices (..., 4, 4) et retourne les rotations (..., 3, 3)."""
+    rot = matrices[..., :3, :3]
+    return rot / np.linalg.norm(rot, axis=-1, keepdims=True)
+
+
+def rotation_to_euler(rot, unwrap=True):
+    """
+    Convertit des rotations (..., 3, 3) en angles d'Euler XYZ (radians), ordre de rotation Maya `xyz`.
+    Par défaut, les angles sont ensuite déroulés dans le temps (premier axe) pour éviter les sauts de ±360°.
+    """
+    x = np.arctan2(rot[..., 1, 2], rot[..., 2, 2])
+    y = np.arcsin(np.clip(-rot[..., 0, 2], -1.0, 1.0))
+    z = np.arctan2(rot[..., 0, 1], rot[..., 0, 0])
+    euler = np.stack([x, y, z], axis=-1)
+    return np.unwrap(euler, axis=0) if unwrap else euler
+
+
+def euler_to_rotation(euler):
+    """Convertit des angles d'Euler XYZ (..., 3) en radians en rotations (..., 3, 3), ordre Maya `xyz`."""
+    cx, cy, cz = np.cos(euler[..., 0]), np.cos(euler[..., 1]), np.cos(euler[..., 2])
+    sx, sy, sz = np.sin(euler[..., 0]), np.sin(euler[..., 1]), np.sin(euler[..., 2])
+    return np.stack([
+        np.stack([cy * cz, cy * sz, -sy], axis=-1),
+        np.stack([sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy], axis=-1),
+        np.stack([cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy], axis=-1),
+    ], axis=-2)
+
+
+def local_rotations(world_rot, parent_rot):
+    """Rotation locale = rotation monde * inverse(rotation monde du parent) (convention Maya, vecteurs ligne)."""
+    return np.einsum("...ij,...kj->...ik", world_rot, parent_rot)
+
+
+def to_parent_space(points, parent_inverse):
+    """Exprime des positions monde (F, 3) dans l'espace du parent (F, 4, 4)."""
+    homogeneous = np.concatenate([points, np.ones(points.shape[:-1] + (1,))], axis=-1)
+    return np.einsum("...i,...ij->...j", homogeneous, parent_inverse)[..., :3]
+
+
+def pole_vector_positions(start, mid, end, fallback):
+    """
+    Calcule la position du pole vector pour chaque frame à partir de trois positions (F, 3).
+    Le pole est placé dans le plan de la chaîne, devant le coude/genou, à une demi-longueur de chaîne.
+    Quand la chaîne est tendue (plan indéfini), la position `fallback` est conservée.
+    """
+    axis = end - start
+    axis_len = np.linalg.norm(axis, axis=-1, keepdims=True)
+    axis_dir = axis / np.maximum(axis_len, 1e-8)
+
+    to_mid = mid - start
+    perp = to_mid - np.sum(to_mid * axis_dir, axis=-1, keepdims=True) * axis_dir
+    perp_len = np.linalg.norm(perp, axis=-1, keepdims=True)
+
+    chain_len = np.linalg.norm(mid - start, axis=-1, keepdims=True) + np.linalg.norm(end - mid, axis=-1, keepdims=True)
+    pv = mid + perp / np.maximum(perp_len, 1e-8) * chain_len * 0.5
+
+    return np.where(perp_len > 1e-4 * np.maximum(chain_len, 1e-8), pv, fallback)
+
+
+###############################
+############################# Écriture des clés
+###############################
+
+
+def load_commands():
+    """Charge le plugin des commandes annulables s'il ne l'est pas encore."""
+    if not cmds.pluginInfo(KEYS_PLUGIN, q=True, loaded=True):
+        cmds.loadPlugin(KEYS_PLUGIN, quiet=True)
+
+
+def apply_modifier(modifier):
+    """
+    Exécute un MDGModifier préparé (valeurs de plugs...) via la commande `autoRigDoModifier`,
+    pour qu'un Ctrl+Z l'annule.
+    """
+    load_commands()
+    _PENDING_MODIFIER[:] = [modifier]
+    try:
+        cmds.autoRigDoModifier()
+    finally:
+        del _PENDING_MODIFIER[:]
+
+
+def add_pending_keys(change, modifier):
+    """
+    Écrit les clés en attente via MFnAnimCurve, une courbe par attribut.
+    Appelée par la commande `autoRigAddKeys`, qui conserve `change` et `modifier` pour l'annulation.
+    """
+    times, values = _PENDING_KEYS[0]
+    for plug_name, plug_values in values.items():
+        plug = get_plug(plug_name)
+        curves = oma.MAnimUtil.findAnimation(plug)
+        curve_fn = oma.MFnAnimCurve()
+        if len(curves):
+            curve_fn.setObject(curves[0])
+        else:
+            curve_fn.create(plug, modifier=modifier)
+            modifier.doIt()
+
+        curve_fn.addKeys(times, om.MDoubleArray([float(v) for v in plug_values]),
+                         oma.MFnAnimCurve.kTangentAuto, oma.MFnAnimCurve.kTangentAuto, True, change)
+
+
+def write_keys(values, frames):
+    """
+    Écrit des clés en masse, une courbe par attribut, de façon annulable.
+
+    :param values: Dictionnaire {"node.attr": tableau de valeurs (unités internes)}
+    :param frames: Liste des frames correspondantes
+    """
+    unit = om.MTime.uiUnit()
+    times = om.MTimeArray([om.MTime(frame, unit) for frame in frames])
+    start, end = frames[0], frames[-1]
+
+    # On vide la plage à remplacer, les clés en dehors sont conservées
+    for plug_name in values:
+        node, attr = plug_name.split(".", 1)
+        cmds.cutKey(node, attribute=attr, time=(start, end), clear=True)
+
+    load_commands()
+    _PENDING_KEYS[:] = [(times, values)]
+    try:
+        cmds.autoRigAddKeys()
+    finally:
+        del _PENDING_KEYS[:]
+
+
+###############################
+############################# Match IK/FK
+###############################
+
+
+def get_limb_nodes(limb, side):
+    """
+    Retourne les noms des éléments d'un membre construit par `Crig_Bp`.
+
+    :param limb: "Arm" ou "Leg"
+    :param side: "L" ou "R"
+    """
+    suffix = f"_{side}"
+    parts = arc.LIMB_PARTS[limb]
+    return {
+        "ik_joints": [f"Ik_{p}{suffix}" for p in parts],
+        "fk_ctrls": [f"C_FK_{p}{suffix}" for p in parts],
+        "ik_ctrl": f"C_IK_{parts[-1]}{suffix}",
+        "pole_vector": f"Ik_PoleV{suffix}_{limb}",
+        "switch": f"C_World.IK_FK_{limb}{suffix}",
+    }
+
+
+def compute_fk_from_ik(ik_world, fk_root_parent):
+    """
+    Calcule les rotations des contrôleurs FK qui reproduisent la chaîne IK.
+
+    :param ik_world: Matrices monde des joints IK (F, 3, 4, 4)
+    :param fk_root_parent: Matrices monde du parent du premier contrôleur FK (F, 4, 4)
+    :return: Angles XYZ en radians (F, 3, 3), un jeu par contrôleur
+    """
+    world_rot = normalize_rotation(ik_world)
+    parent_rot = np.concatenate([normalize_rotation(fk_root_parent)[:, None], world_rot[:, :-1]], axis=1)
+    return rotation_to_euler(local_rotations(world_rot, parent_rot))
+
+
+def compute_ik_from_fk(fk_world, ik_ctrl_parent, pv_world, pv_parent):
+    """
+    Calcule la position/orientation du contrôleur IK et la position du pole vector
+    qui reproduisent la chaîne FK.
+
+    :param fk_world: Matrices monde des contrôleurs FK (F, 3, 4, 4)
+    :param ik_ctrl_parent: Matrices monde du parent du contrôleur IK (F, 4, 4)
+    :param pv_world: Matrices monde actuelles du pole vector (F, 4, 4)
+    :param pv_parent: Matrices monde du parent du pole vector (F, 4, 4)
+    :return: (translation IK (F, 3), rotation IK (F, 3), translation pole vector (F, 3))
+    """
+    positions = fk_world[..., 3, :3]
+    end_world = fk_world[:, -1]
+
+    ik_translate = to_parent_space(positions[:, -1], np.linalg.inv(ik_ctrl_parent))
+    ik_rotate = rotation_to_euler(local_rotations(normalize_rotation(end_world), normalize_rotation(ik_ctrl_parent)))
+
+    pv = pole_vector_positions(positions[:, 0], positions[:, 1], positions[:, 2], pv_world[:, 3, :3])
+    pv_translate = to_parent_space(pv, np.linalg.inv(pv_parent))
+
+    return ik_translate, ik_rotate, pv_translate
+
+
+def match_bake(limb, side, target="FK", start=None, end=None, set_switch=True):
+    """
+    Aligne les contrôleurs FK sur la chaîne IK (ou l'inverse) sur une plage de frames,
+    puis écrit toutes les clés en une fois.
+
+    :param limb: "Arm" ou "Leg"
+    :param side: "L" ou "R"
+    :param target: Mode à obtenir, "FK" (match IK -> FK) ou "IK" (match FK -> IK)
+    :param start: Première frame (par défaut, début du time slider)
+    :param end: Dernière frame (par défaut, fin du time slider)
+    :param set_switch: Bascule l'attribut IK_FK de `C_World` sur le mode cible
+    :return: Nombre de frames traitées
+    """
+    nodes = get_limb_nodes(limb, side)
+    required = nodes["ik_joints"] + nodes["fk_ctrls"] + [nodes["ik_ctrl"], nodes["pole_vector"]]
+    missing = [n for n in required if not cmds.objExists(n)]
+    if missing:
+        cmds.warning(f"Éléments manquants pour le match {limb}_{side} : {', '.join(missing)}")
+        return 0
+
+    if start is None:
+        start = cmds.playbackOptions(q=True, minTime=True)
+    if end is None:
+        end = cmds.playbackOptions(q=True, maxTime=True)
+    frames = [float(f) for f in range(int(start), int(end) + 1)]
+
+    keys = {}
+    if target == "FK":
+        # La chaîne IK n'est résolue qu'en déplaçant réellement le temps
+        world = sample_world_matrices(nodes["ik_joints"], frames, step_time=True)
+        parent = sample_world_matrices(nodes["fk_ctrls"][:1], frames, "parentMatrix[0]")[:, 0]
+        euler = compute_fk_from_ik(world, parent)
+        for i, ctrl in enumerate(nodes["fk_ctrls"]):
+            for a, axis in enumerate("XYZ"):
+                keys[f"{ctrl}.rotate{axis}"] = euler[:, i, a]
+    elif target == "IK":
+        world = sample_world_matrices(nodes["fk_ctrls"] + [nodes["pole_vector"]], frames)
+        parents = sample_world_matrices([nodes["ik_ctrl"], nodes["pole_vector"]], frames, "parentMatrix[0]")
+        ik_t, ik_r, pv_t = compute_ik_from_fk(world[:, :3], parents[:, 0], world[:, 3], parents[:, 1])
+        for a, axis in enumerate("XYZ"):
+            keys[f"{nodes['ik_ctrl']}.translate{axis}"] = ik_t[:, a]
+            keys[f"{nodes['ik_ctrl']}.rotate{axis}"] = ik_r[:, a]
+            keys[f"{nodes['pole_vector']}.translate{axis}"] = pv_t[:, a]
+    else:
+        cmds.error(f"Le mode cible '{target}' est invalide. Utilise 'IK' ou 'FK'.")
+
+    # Un seul bloc d'annulation pour les clés du membre et celles du switch
+    cmds.undoInfo(openChunk=True, chunkName=f"AutoRig_Match_{limb}_{side}")
+    try:
+        write_keys(keys, frames)
+
+        if set_switch and cmds.objExists(nodes["switch"]):
+            value = 1 if target == "FK" else 0
+            if cmds.keyframe(nodes["switch"], q=True, keyframeCount=True):
+                # Les clés existantes dans la plage feraient rebasculer le membre
+                switch_node, switch_attr = nodes["switch"].split(".", 1)
+                cmds.cutKey(switch_node, attribute=switch_attr, time=(start, end), clear=True)
+                for t in (start, end):
+                    cmds.setKeyframe(nodes["switch"], time=t, value=value)
+            else:
+                cmds.setAttr(nodes["switch"], value)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    print(f">> Match {limb}_{side} vers {target} : {len(frames)} frames bakées.")
+    return len(frames)
@@ -0,0 +1,292 @@
+import os
+import json
+
+import maya.cmds as cmds
+
+import AutoRigCore as arc
+
+
+# Dossier des descriptions de rigs livrées (`<nom>_rig.json`)
+RIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Opérations disponibles dans un plan : nom de l'étape -> fonction de AutoRigCore
+OPS = {
+    "world_control": "create_world_control",
+    "deform_joints": "create_deform_joints",
+    "ik_joints": "create_ik_joints",
+    "pole_vector": "create_pole_vector",
+    "ik_handle": "create_ik_handle",
+    "twist": "split_deformer_chain",
+    "fk_controls": "create_fk_controls",
+    "ik_control": "create_ik_control",
+    "ik_fk_switch": "setup_constraints_and_switch",
+}
+
+# Opérations de scène directes
+SCENE_OPS = {
+    "parent": cmds.parent,
+}
+
+# Plans déjà compilés, par description
+_PLAN_CACHE = {}
+
+
+###############################
+############################# Descriptions
+###############################
+
+
+def load_description(rig):
+    """
+    Charge la description d'un rig.
+
+    :param rig: Nom d'une description livrée (`biped` -> `biped_rig.json`) ou chemin d'un fichier JSON
+    :return: Dictionnaire de description, ou None en cas d'erreur
+    """
+    path = rig if rig.endswith(".json") else os.path.join(RIG_DIR, f"{rig}_rig.json")
+    try:
+        with open(path, 'r') as json_file:
+            return json.load(json_file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        cmds.warning(f"Erreur lors de la lecture de la description de rig : {e}")
+        return None
+
+
+def get_module_guides(module, chains):
+    """Retourne les guides lus par un module (chaîne puis pole vector)."""
+    if module["type"] != "limb":
+        return []
+    suffix = f"_{module['side']}"
+    guides = [f"G_{part}{suffix}" for part in chains[module["limb"]]]
+    if module.get("pole_vector"):
+        guides.append(module["pole_vector"])
+    return guides
+
+
+###############################
+############################# Compilation
+###############################
+
+
+def step(step_id, op, args=(), deps=()):
+    """Crée une étape de plan. Les arguments `@<id>` sont remplacés par le résultat de l'étape `<id>`."""
+    refs = [a[1:] for a in args if isinstance(a, str) and a.startswith("@")]
+    return {"id": step_id, "op": op, "args": list(args), "deps": sorted(set(deps) | set(refs))}
+
+
+def world_steps(module, chains):
+    """Étape du contrôleur global `C_World`."""
+    return [step(f"{module['name']}.control", "world_control")]
+
+
+def limb_steps(module, chains):
+    """
+    Étapes d'un membre IK/FK : chaînes de joints, pole vector, IK handle, contrôleurs,
+    puis les fonctionnalités optionnelles (`twist`, `ik_fk_switch`).
+    La chaîne du membre est passée aux opérations, `LIMB_PARTS` n'est jamais modifié.
+    """
+    name = module["name"]
+    limb = module["limb"]
+    suffix = f"_{module['side']}"
+    parts = chains[limb]
+    end = module.get("end", parts[-1])
+    features = module.get("features", [])
+
+    steps = [
+        step(f"{name}.deform_joints", "deform_joints", [suffix, limb, parts]),
+        step(f"{name}.ik_joints", "ik_joints", [suffix, limb, parts]),
+        step(f"{name}.pole_vector", "pole_vector", [suffix, limb, module.get("pole_vector")]),
+        step(f"{name}.ik_handle", "ik_handle", [f"@{name}.ik_joints", suffix, f"@{name}.pole_vector", limb]),
+    ]
+    if "twist" in features:
+        steps.append(step(f"{name}.twist", "twist", [f"@{name}.deform_joints"]))
+    steps += [
+        step(f"{name}.fk_controls", "fk_controls", [suffix, limb, parts]),
+        step(f"{name}.ik_control", "ik_control", [suffix, end]),
+        step(f"{name}.parent_ik_handle", "parent", [f"@{name}.ik_handle", f"@{name}.ik_control"]),
+    ]
+    if "ik_fk_switch" in features:
+        steps.append(step(f"{name}.ik_fk_switch", "ik_fk_switch",
+                          [f"@{name}.deform_joints", f"@{name}.ik_joints",
+                           f"@{name}.fk_controls", f"@{name}.ik_control", suffix]))
+    return steps
+
+
+# Types de modules : type -> générateur d'étapes
+MODULE_TYPES = {
+    "world": world_steps,
+    "limb": limb_steps,
+}
+
+
+def deduplicate(steps):
+    """
+    Fusionne les étapes identiques (même opération, mêmes arguments) et les étapes déclarées
+    plusieurs fois sous le même identifiant.
+
+    :return: Liste d'étapes sans doublon, références réécrites vers l'étape conservée
+    """
+    kept, by_signature, aliases = {}, {}, {}
+    for s in steps:
+        signature = json.dumps([s["op"], s["args"]])
+        if s["id"] in kept or signature in by_signature:
+            original = kept.get(s["id"]) or by_signature[signature]
+            aliases[s["id"]] = original["id"]
+            original["deps"] = sorted(set(original["deps"]) | set(s["deps"]))
+            continue
+        kept[s["id"]] = s
+        by_signature[signature] = s
+
+    def rename(ref):
+        return aliases.get(ref, ref)
+
+    for s in kept.values():
+        s["args"] = [f"@{rename(a[1:])}" if isinstance(a, str) and a.startswith("@") else a for a in s["args"]]
+        s["deps"] = sorted({rename(d) for d in s["deps"]} - {s["id"]})
+    return list(kept.values())
+
+
+def order_steps(steps):
+    """Tri topologique stable (ordre de déclaration conservé à dépendances égales)."""
+    remaining = {s["id"]: set(s["deps"]) for s in steps}
+    unknown = {d for deps in remaining.values() for d in deps} - set(remaining)
+    if unknown:
+        raise ValueError(f"Dépendances inconnues : {', '.join(sorted(unknown))}")
+
+    ordered, done = [], set()
+    while len(ordered) < len(steps):
+        progressed = False
+        for s in steps:
+            if s["id"] not in done and remaining[s["id"]] <= done:
+                ordered.append(s)
+                done.add(s["id"])
+                progressed = True
+        if not progressed:
+            cycle = sorted(set(remaining) - done)
+            raise ValueError(f"Cycle dans le plan de construction : {', '.join(cycle)}")
+    return ordered
+
+
+def compile_plan(description, use_cache=True):
+    """
+    Compile une description de rig en plan de construction ordonné.
+
+    :param description: Description (voir `biped_rig.json`)
+    :param use_cache: Réutilise le plan déjà compilé pour une description identique
+    :return: Plan {"name", "chains", "guides", "steps"}
+    """
+    key = json.dumps(description, sort_keys=True)
+    if use_cache and key in _PLAN_CACHE:
+        return _PLAN_CACHE[key]
+
+    chains = dict(arc.LIMB_PARTS)
+    chains.update(description.get("chains", {}))
+
+    generated, guides = {}, {}
+    for module in description["modules"]:
+        if module["type"] not in MODULE_TYPES:
+            raise ValueError(f"Type de module inconnu : {module['type']}")
+        generated[module["name"]] = MODULE_TYPES[module["type"]](module, chains)
+        guides[module["name"]] = get_module_guides(module, chains)
+
+    # Un module dépend de toutes les étapes des modules qu'il requiert, quel que soit l'ordre de déclaration
+    steps = []
+    for module in description["modules"]:
+        unknown = [req for req in module.get("requires", []) if req not in generated]
+        if unknown:
+            raise ValueError(f"Module {module['name']} : modules requis inconnus : {', '.join(unknown)}")
+
+        required = [s["id"] for req in module.get("requires", []) for s in generated[req]]
+        for s in generated[module["name"]]:
+            s["deps"] = sorted(set(s["deps"]) | set(required))
+        steps += generated[module["name"]]
+
+    plan = {
+        "name": description.get("name", "Custom"),
+        "chains": chains,
+        "guides": guides,
+        "steps": order_steps(deduplicate(steps)),
+    }
+    _PLAN_CACHE[key] = plan
+    return plan
+
+
+def describe_plan(plan):
+    """Affiche le plan sans rien construire (dry run) et retourne ses lignes."""
+    lines = [f"==> Plan du rig {plan['name']} : {len(plan['steps'])} étapes"]
+    for i, s in enumerate(plan["steps"], 1):
+        args = ", ".join(str(a) for a in s["args"])
+        deps = f"  <- {', '.join(s['deps'])}" if s["deps"] else ""
+        lines.append(f"  {i:3d}. {s['id']} : {s['op']}({args}){deps}")
+    print("\n".join(lines))
+    return lines
+
+
+###############################
+############################# Exécution
+###############################
+
+
+def compute_placements(plan):
+    """
+    Étape de lecture, avant toute écriture dans la scène : les guides de tous les modules
+    sont lus en une passe et les guides manquants sont signalés par module.
+
+    :return: Dictionnaire {guide: (translation, rotation)}, ou None si des guides manquent
+    """
+    all_guides = sorted({g for guides in plan["guides"].values() for g in guides})
+    existing = {g for g in all_guides if cmds.objExists(g)}
+    transforms = {g: (cmds.xform(g, q=True, ws=True, t=True), cmds.xform(g, q=True, ws=True, ro=True))
+                  for g in existing}
+
+    errors = []
+    for module, guides in plan["guides"].items():
+        missing = [g for g in guides if g not in transforms]
+        if missing:
+            errors.append(f"{module} : {', '.join(missing)}")
+
+    if errors:
+        cmds.warning(f"Guides manquants, construction annulée -> {' | '.join(errors)}")
+        return None
+    return transforms
+
+
+def get_op(op):
+    """Retourne la fonction qui exécute une opération du plan."""
+    if op in SCENE_OPS:
+        return SCENE_OPS[op]
+    return getattr(arc, OPS[op])
+
+
+def execute_plan(plan):
+    """
+    Exécute un plan : placements calculés en amont, puis écritures dans la scène
+    groupées dans un seul bloc d'annulation, rafraîchissement de la vue suspendu.
+
+    :return: Dictionnaire {id d'étape: résultat}, ou None si le plan n'a pas pu être exécuté
+    """
+    placements = compute_placements(plan)
+    if placements is None:
+        return None
+
+    arc.GUIDE_CACHE.update(placements)
+    results = {}
+    current_module = None
+
+    cmds.undoInfo(openChunk=True, chunkName=f"AutoRig_{plan['name']}")
+    cmds.refresh(suspend=True)
+    try:
+        for s in plan["steps"]:
+            module = s["id"].split(".", 1)[0]
+            if module != current_module:
+                print(f">> Création du module {module}...")
+                current_module = module
+
+            args = [results[a[1:]] if isinstance(a, str) and a.startswith("@") else a for a in s["args"]]
+            results[s["id"]] = get_op(s["op"])(*args)
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        arc.GUIDE_CACHE.clear()
+
+    return results
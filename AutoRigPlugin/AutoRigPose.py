@@ -0,0 +1,215 @@
+import os
+
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+import AutoRigCore as arc
+from AutoRigShapes import get_controls
+from AutoRigMatch import apply_modifier
+
+
+# Attributs à inverser lors d'un miroir en X : les contrôleurs gauches sont des copies réfléchies
+# des droits (guides issus de `symetrie`, groupe en scaleX -1), les centraux sont symétriques
+MIRROR_ATTRS = ("translateX", "rotateY", "rotateZ")
+
+
+###############################
+############################# Capture
+###############################
+
+
+def strip_namespace(name):
+    """Retire le namespace d'un nom de node."""
+    return name.split(":")[-1]
+
+
+def is_posable(plug):
+    """Un attribut est posable s'il n'est piloté par rien d'autre qu'une courbe d'animation."""
+    if not plug.isDestination:
+        return True
+    return plug.source().node().hasFn(om.MFn.kAnimCurve)
+
+
+def resolve_plugs(names, namespace=""):
+    """
+    Résout une liste de `ctrl.attr` en MPlug pour un personnage.
+
+    :return: (liste des index résolus, liste des MPlug correspondants)
+    """
+    prefix = f"{namespace}:" if namespace else ""
+    indices, plugs = [], []
+    for i, name in enumerate(names):
+        sel = om.MSelectionList()
+        try:
+            sel.add(f"{prefix}{name}")
+        except RuntimeError:
+            continue
+        indices.append(i)
+        plugs.append(sel.getPlug(0))
+    return indices, plugs
+
+
+def capture_pose(namespace=""):
+    """
+    Capture tous les attributs keyables des contrôleurs `C_*` (dont `C_World`) d'un personnage.
+
+    :param namespace: Namespace du personnage ("" pour la scène courante)
+    :return: Pose {"attributes": tableau de `ctrl.attr` sans namespace, "values": tableau float64 (unités internes)}
+    """
+    prefix = f"{namespace}:" if namespace else ""
+    names = []
+    for ctrl in get_controls(f"{prefix}C_*"):
+        for attr in cmds.listAttr(ctrl, keyable=True, unlocked=True, scalar=True) or []:
+            names.append(f"{strip_namespace(ctrl)}.{attr}")
+
+    indices, plugs = resolve_plugs(names, namespace)
+    kept = [(names[i], plug) for i, plug in zip(indices, plugs) if is_posable(plug)]
+
+    return {
+        "attributes": np.array([name for name, _ in kept]),
+        "values": np.array([plug.asDouble() for _, plug in kept], dtype=np.float64),
+    }
+
+
+###############################
+############################# Bibliothèque
+###############################
+
+
+def save_pose(path, pose):
+    """Sauvegarde une pose dans un fichier `.npz`."""
+    np.savez_compressed(path, attributes=pose["attributes"], values=pose["values"])
+    print(f">> Pose sauvegardée dans {path} ({len(pose['values'])} attributs).")
+
+
+def load_pose(path):
+    """Relit une pose sauvegardée par `save_pose`."""
+    with np.load(path) as data:
+        return {"attributes": data["attributes"], "values": data["values"]}
+
+
+def list_poses(directory):
+    """Retourne {nom: chemin} des poses d'une bibliothèque."""
+    return {os.path.splitext(f)[0]: os.path.join(directory, f)
+            for f in sorted(os.listdir(directory)) if f.endswith(".npz")}
+
+
+###############################
+############################# Miroir et mélange
+###############################
+
+
+def mirror_attribute(name):
+    """
+    Retourne l'attribut miroir de `ctrl.attr` et le signe à appliquer à sa valeur.
+    Les côtés sont échangés avec `inverse_suffix`, sur le contrôleur comme sur l'attribut
+    (ex : `C_World.IK_FK_Arm_L`). Tous les contrôleurs sont inversés en X (voir `MIRROR_ATTRS`).
+    """
+    ctrl, attr = name.split(".", 1)
+    sign = -1.0 if attr in MIRROR_ATTRS else 1.0
+    return f"{arc.inverse_suffix(ctrl)}.{arc.inverse_suffix(attr)}", sign
+
+
+def mirror_pose(pose):
+    """Retourne la pose miroir (gauche <-> droite)."""
+    mirrored = [mirror_attribute(name) for name in pose["attributes"].tolist()]
+    signs = np.array([sign for _, sign in mirrored], dtype=np.float64)
+    return {
+        "attributes": np.array([name for name, _ in mirrored]),
+        "values": pose["values"] * signs,
+    }
+
+
+def check_mirror(pose=None, tolerance=1e-4):
+    """
+    Vérifie le miroir sur une pose symétrique (par défaut, la pose courante, à capturer au repos) :
+    la pose miroir doit redonner la pose elle-même.
+
+    :return: Liste des écarts {"attribute", "value", "mirrored"}, vide si le miroir est correct
+    """
+    pose = capture_pose() if pose is None else pose
+    values = dict(zip(pose["attributes"].tolist(), pose["values"].tolist()))
+    mirrored = mirror_pose(pose)
+
+    errors = []
+    for name, value in zip(mirrored["attributes"].tolist(), mirrored["values"].tolist()):
+        if name in values and abs(values[name] - value) > tolerance:
+            errors.append({"attribute": name, "value": values[name], "mirrored": value})
+
+    for error in errors:
+        cmds.warning(f"Miroir incorrect sur {error['attribute']} : {error['value']} -> {error['mirrored']}")
+    return errors
+
+
+def blend_poses(poses, weights):
+    """
+    Mélange pondéré de plusieurs poses.
+    Un attribut absent d'une pose est mélangé uniquement entre les poses qui le contiennent ;
+    un attribut dont toutes les poses ont un poids nul est retiré du résultat.
+
+    :param poses: Liste de poses
+    :param weights: Liste de poids (normalisés par attribut)
+    :return: Pose mélangée
+    """
+    attributes = np.unique(np.concatenate([pose["attributes"] for pose in poses]))
+    values = np.full((len(poses), len(attributes)), np.nan)
+    for i, pose in enumerate(poses):
+        values[i, np.searchsorted(attributes, pose["attributes"])] = pose["values"]
+
+    present = ~np.isnan(values)
+    w = np.asarray(weights, dtype=np.float64)[:, None] * present
+    total = w.sum(axis=0)
+    blended = (np.where(present, values, 0.0) * w).sum(axis=0)
+    kept = total != 0
+
+    return {
+        "attributes": attributes[kept],
+        "values": blended[kept] / total[kept],
+    }
+
+
+###############################
+############################# Application
+###############################
+
+
+def apply_pose(pose, namespaces=("",), weight=1.0):
+    """
+    Applique une pose à un ou plusieurs personnages, avec une seule modification du graphe,
+    annulable en un Ctrl+Z.
+
+    :param pose: Pose à appliquer
+    :param namespaces: Namespaces des personnages cibles ("" pour la scène courante)
+    :param weight: 1.0 applique la pose entière, une valeur inférieure l'interpole depuis la pose courante
+    :return: Nombre d'attributs modifiés
+    """
+    names = pose["attributes"].tolist()
+    modifier = om.MDGModifier()
+    count = 0
+
+    for namespace in namespaces:
+        indices, plugs = resolve_plugs(names, namespace)
+        if not plugs:
+            cmds.warning(f"Aucun contrôleur trouvé pour le personnage '{namespace}'.")
+            continue
+
+        target = pose["values"][indices]
+        if weight != 1.0:
+            current = np.array([plug.asDouble() for plug in plugs], dtype=np.float64)
+            target = current + (target - current) * weight
+
+        for plug, value in zip(plugs, target.tolist()):
+            modifier.newPlugValueDouble(plug, value)
+        count += len(plugs)
+
+    apply_modifier(modifier)
+    return count
+
+
+def apply_blend(paths, weights, namespaces=("",), mirror=False):
+    """Charge, mélange (et éventuellement inverse) des poses de la bibliothèque, puis les applique."""
+    pose = blend_poses([load_pose(p) for p in paths], weights)
+    if mirror:
+        pose = mirror_pose(pose)
+    return apply_pose(pose, namespaces)
@@ -0,0 +1,347 @@
+import json
+from collections import Counter, defaultdict
+
+import maya.cmds as cmds
+
+import AutoRigCore as arc
+
+
+# Nodes de départ du parcours : tout ce que `Crig_Bp` nomme directement
+RIG_SEEDS = ["C_*", "D_*", "Ik_*", "IkHandle_*"]
+
+# Types partagés par toute la scène, jamais comptés dans le rig
+IGNORED_TYPES = {
+    "time", "animCurveTL", "animCurveTA", "animCurveTU", "animCurveTT",
+    "nodeGraphEditorInfo", "hyperLayout", "hyperView", "defaultRenderUtilityList",
+    "renderLayer", "displayLayer", "objectSet", "shadingEngine",
+}
+
+# Types qui forcent une évaluation série ou un retour au DG
+BARRIER_TYPES = {"expression", "script", "scriptNode"}
+
+# Entrées d'une contrainte lues sur le node contraint (parentInverseMatrix, rotatePivot...) :
+# elles n'affectent pas les sorties qui pilotent ce node, ce ne sont pas des cycles
+CONSTRAINT_FEEDBACK_ATTRS = ("constraint", "pivotSpace")
+
+# Règles de classement par fonctionnalité, testées dans l'ordre
+FEATURE_RULES = [
+    ("squash", lambda name, node_type: "Squash" in name or "Stretch" in name),
+    ("twist", lambda name, node_type: "_Mid_" in name or name.endswith("_rotX_mult")),
+    ("ik_fk_switch", lambda name, node_type: "IK_FK_" in name or name.endswith("_Blend")
+        or node_type in ("parentConstraint", "orientConstraint")),
+    ("ik", lambda name, node_type: name.startswith(("Ik_", "IkHandle_"))
+        or node_type in ("ikEffector", "poleVectorConstraint")),
+    ("fk", lambda name, node_type: name.startswith("C_FK_")),
+]
+
+# Budget par défaut (nombre de nodes), à surcharger par un fichier JSON
+DEFAULT_BUDGET = {
+    "total": 400,
+    "features": {"twist": 60, "ik_fk_switch": 60, "squash": 60, "ik": 60, "fk": 40},
+    "limbs": {},
+}
+
+# Cache de la classification "utility" par type de node
+_UTILITY_TYPES = {}
+
+
+###############################
+############################# Parcours du graphe
+###############################
+
+
+def short_name(node):
+    """Retire le chemin DAG d'un nom de node."""
+    return node.split("|")[-1]
+
+
+def get_limb(name):
+    """Retourne le membre (`Arm_L`, `Leg_R`...) auquel appartient un node, ou `Global`."""
+    for limb, parts in arc.LIMB_PARTS.items():
+        for side in ("L", "R"):
+            tokens = [f"{p}_{side}" for p in parts] + [f"{limb}_{side}", f"_{side}_{limb}"]
+            if any(token in name for token in tokens):
+                return f"{limb}_{side}"
+    return "Global"
+
+
+def get_feature(name, node_type):
+    """Retourne la fonctionnalité (twist, ik_fk_switch, squash...) à laquelle appartient un node."""
+    for feature, rule in FEATURE_RULES:
+        if rule(name, node_type):
+            return feature
+    return "base"
+
+
+def is_utility(node_type):
+    """Indique si un type de node est classé comme utilitaire."""
+    if node_type not in _UTILITY_TYPES:
+        _UTILITY_TYPES[node_type] = bool(cmds.getClassification(node_type, satisfies="utility"))
+    return _UTILITY_TYPES[node_type]
+
+
+def get_barrier_types():
+    """Types de nodes sérialisés ou non fiables pour l'évaluation parallèle."""
+    types = set(BARRIER_TYPES)
+    for flag in ("nodeTypeUntrusted", "nodeTypeSerialize", "nodeTypeGloballySerialize"):
+        try:
+            types.update(cmds.evaluationManager(query=True, **{flag: True}) or [])
+        except (RuntimeError, TypeError):
+            pass
+    return types
+
+
+def walk_rig(seeds=RIG_SEEDS):
+    """
+    Parcourt une seule fois le rig construit, à partir des nodes nommés et de leurs descendants DAG,
+    en suivant toutes les connexions (hors `message`).
+
+    :return: (dictionnaire {node: type}, liste des connexions (plug source, plug destination))
+    """
+    defaults = set(cmds.ls(defaultNodes=True) or [])
+    start = cmds.ls(seeds, long=True) or []
+    start += cmds.listRelatives(start, allDescendents=True, fullPath=True) or []
+
+    nodes = {}
+    edges = set()
+    pending = list(start)
+
+    while pending:
+        node = pending.pop()
+        name = short_name(node)
+        if name in nodes or name in defaults:
+            continue
+        node_type = cmds.nodeType(node)
+        if node_type in IGNORED_TYPES:
+            continue
+        nodes[name] = node_type
+
+        for outgoing in (True, False):
+            pairs = cmds.listConnections(node, source=not outgoing, destination=outgoing,
+                                         connections=True, plugs=True, skipConversionNodes=False) or []
+            for local_plug, other_plug in zip(pairs[::2], pairs[1::2]):
+                if local_plug.endswith(".message") or other_plug.endswith(".message"):
+                    continue
+                local_plug = f"{name}.{local_plug.split('.', 1)[1]}"
+                edges.add((local_plug, other_plug) if outgoing else (other_plug, local_plug))
+                pending.append(other_plug.split(".", 1)[0])
+
+    # Les connexions vers des nodes ignorés ne font pas partie du rig
+    edges = [(s, d) for s, d in edges if s.split(".", 1)[0] in nodes and d.split(".", 1)[0] in nodes]
+    return nodes, sorted(edges)
+
+
+###############################
+############################# Contrôles
+###############################
+
+
+def is_constraint_feedback(dst, nodes):
+    """Indique si une connexion alimente une entrée de retour d'une contrainte (voir `CONSTRAINT_FEEDBACK_ATTRS`)."""
+    node, attr = dst.split(".", 1)
+    return nodes.get(node, "").endswith("Constraint") and attr.startswith(CONSTRAINT_FEEDBACK_ATTRS)
+
+
+def find_cycles(nodes, edges):
+    """
+    Retourne les cycles du graphe de dépendances (composantes fortement connexes de plus d'un node).
+    Les entrées de retour des contraintes sont ignorées : chaque contrainte formerait sinon
+    un faux cycle avec le node qu'elle pilote.
+    """
+    graph = defaultdict(set)
+    for src, dst in edges:
+        s, d = src.split(".", 1)[0], dst.split(".", 1)[0]
+        if s != d and not is_constraint_feedback(dst, nodes):
+            graph[s].add(d)
+
+    index, low, stack, on_stack, cycles = {}, {}, [], set(), []
+
+    for root in nodes:
+        if root in index:
+            continue
+        # Tarjan itératif
+        work = [(root, iter(graph[root]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is None:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        item = stack.pop()
+                        on_stack.discard(item)
+                        component.append(item)
+                        if item == node:
+                            break
+                    if len(component) > 1:
+                        cycles.append(sorted(component))
+            elif child not in index:
+                index[child] = low[child] = len(index)
+                stack.append(child)
+                on_stack.add(child)
+                work.append((child, iter(graph[child])))
+            elif child in on_stack:
+                low[node] = min(low[node], index[child])
+
+    return cycles
+
+
+def find_dead_nodes(nodes, edges):
+    """
+    Repère les nodes utilitaires inutiles ou mal branchés :
+      - sorties jamais connectées (node mort),
+      - canaux de sortie d'un `condition` configurés mais inutilisés,
+      - `condition` qui recopie simplement un switch 0/1,
+      - utilitaire entre un switch IK/FK et une visibilité (le `reverse` de `create_ik_fk_switch`,
+        dont la sortie est forcée par `setAttr` avant d'être connectée), repéré sur le graphe,
+      - sorties connectées dont la valeur a aussi été forcée par `setAttr` : ce dernier contrôle
+        s'appuie sur `changedSinceFileOpen` et ne vaut que dans la session qui a construit le rig.
+    """
+    sources = Counter(s.split(".", 1)[0] for s, _ in edges)
+    used_by_node = defaultdict(set)
+    switch_driven, drives_visibility = set(), set()
+    for src, dst in edges:
+        node, attr = src.split(".", 1)
+        used_by_node[node].add(attr)
+        if attr.startswith("IK_FK_"):
+            switch_driven.add(dst.split(".", 1)[0])
+        if dst.endswith(".visibility"):
+            drives_visibility.add(node)
+
+    dead = []
+    for node, node_type in sorted(nodes.items()):
+        if not is_utility(node_type):
+            continue
+
+        if not sources[node]:
+            dead.append({"node": node, "reason": "aucune sortie connectée"})
+            continue
+
+        if node_type == "condition":
+            used = used_by_node[node]
+            for channel in "RGB":
+                if f"outColor{channel}" in used or "outColor" in used:
+                    continue
+                if (cmds.getAttr(f"{node}.colorIfTrue{channel}") != 0
+                        or cmds.getAttr(f"{node}.colorIfFalse{channel}") != 1):
+                    dead.append({"node": node, "reason": f"outColor{channel} configuré mais inutilisé"})
+
+            if (cmds.connectionInfo(f"{node}.firstTerm", isDestination=True)
+                    and cmds.getAttr(f"{node}.operation") == 0 and cmds.getAttr(f"{node}.secondTerm") == 0
+                    and cmds.getAttr(f"{node}.colorIfTrueR") == 0 and cmds.getAttr(f"{node}.colorIfFalseR") == 1):
+                dead.append({"node": node, "reason": "recopie le switch (connexion directe possible)"})
+
+        if node_type != "condition" and node in switch_driven and node in drives_visibility:
+            dead.append({"node": node, "reason": "sortie de visibilité forcée par setAttr puis pilotée par le switch"})
+            continue
+
+        # Attributs modifiés pendant la session qui sont aussi des sorties connectées
+        changed = set(cmds.listAttr(node, changedSinceFileOpen=True) or [])
+        for attr in sorted(changed & used_by_node[node]):
+            dead.append({"node": node, "reason": f"sortie {attr} forcée par setAttr puis connectée"})
+
+    return dead
+
+
+###############################
+############################# Rapport
+###############################
+
+
+def analyse_rig(seeds=RIG_SEEDS):
+    """
+    Analyse le rig construit par `Crig_Bp` et compte ses nodes par type, membre et fonctionnalité.
+
+    :return: Rapport sérialisable en JSON
+    """
+    nodes, edges = walk_rig(seeds)
+    barrier_types = get_barrier_types()
+
+    def empty_bucket():
+        return {"nodes": 0, "constraints": 0, "utility_nodes": 0, "by_type": Counter()}
+
+    limbs = defaultdict(empty_bucket)
+    features = defaultdict(empty_bucket)
+    barriers = []
+
+    for node, node_type in nodes.items():
+        limb = get_limb(node)
+        feature = get_feature(node, node_type)
+        for bucket in (limbs[limb], features[feature]):
+            bucket["nodes"] += 1
+            bucket["constraints"] += node_type.endswith("Constraint")
+            bucket["utility_nodes"] += is_utility(node_type)
+            bucket["by_type"][node_type] += 1
+        limbs[limb].setdefault("features", Counter())[feature] += 1
+
+        if node_type in barrier_types:
+            barriers.append({"node": node, "type": node_type})
+
+    report = {
+        "nodes": len(nodes),
+        "connections": len(edges),
+        "constraints": sum(t.endswith("Constraint") for t in nodes.values()),
+        "utility_nodes": sum(is_utility(t) for t in nodes.values()),
+        "by_type": dict(Counter(nodes.values()).most_common()),
+        "limbs": {k: dict(v, by_type=dict(v["by_type"]), features=dict(v["features"])) for k, v in limbs.items()},
+        "features": {k: dict(v, by_type=dict(v["by_type"])) for k, v in features.items()},
+        "dead_nodes": find_dead_nodes(nodes, edges),
+        "cycles": find_cycles(nodes, edges),
+        "barriers": barriers,
+    }
+    return report
+
+
+def export_report(report, path):
+    """Écrit le rapport au format JSON."""
+    with open(path, "w") as json_file:
+        json.dump(report, json_file, indent=4)
+    print(f">> Rapport du rig écrit dans {path}.")
+
+
+def load_budget(path=None):
+    """Charge un budget JSON (mêmes clés que `DEFAULT_BUDGET`), complété par les valeurs par défaut."""
+    budget = {"total": DEFAULT_BUDGET["total"],
+              "features": dict(DEFAULT_BUDGET["features"]),
+              "limbs": dict(DEFAULT_BUDGET["limbs"])}
+    if path:
+        try:
+            with open(path, "r") as json_file:
+                data = json.load(json_file)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            cmds.warning(f"Erreur lors de la lecture du budget : {e}")
+            return budget
+        budget["total"] = data.get("total", budget["total"])
+        budget["features"].update(data.get("features", {}))
+        budget["limbs"].update(data.get("limbs", {}))
+    return budget
+
+
+def check_budget(report, budget=None):
+    """
+    Compare le rapport au budget de nodes.
+
+    :return: Liste des dépassements (messages), vide si le rig respecte le budget
+    """
+    budget = budget or load_budget()
+    violations = []
+
+    if budget.get("total") is not None and report["nodes"] > budget["total"]:
+        violations.append(f"Rig : {report['nodes']} nodes (budget {budget['total']})")
+
+    for key in ("features", "limbs"):
+        for name, limit in budget.get(key, {}).items():
+            count = report[key].get(name, {}).get("nodes", 0)
+            if count > limit:
+                violations.append(f"{name} : {count} nodes (budget {limit})")
+
+    if report["cycles"]:
+        violations.append(f"{len(report['cycles'])} cycle(s) détecté(s)")
+
+    return violations
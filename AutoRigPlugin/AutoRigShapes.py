@@ -0,0 +1,168 @@
+import numpy as np
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+
+def get_controls(pattern="C_*"):
+    """Retourne les contrôleurs (transforms portant au moins une courbe NURBS) correspondant au motif."""
+    return [ctrl for ctrl in cmds.ls(pattern, type="transform") or []
+            if cmds.listRelatives(ctrl, shapes=True, type="nurbsCurve", noIntermediate=True)]
+
+
+def get_curve_shapes(ctrl):
+    """Retourne les MDagPath des courbes NURBS d'un contrôleur."""
+    sel = om.MSelectionList()
+    for shape in cmds.listRelatives(ctrl, shapes=True, type="nurbsCurve", noIntermediate=True, fullPath=True) or []:
+        sel.add(shape)
+    return [sel.getDagPath(i) for i in range(sel.length())]
+
+
+def points_to_numpy(points):
+    """Convertit un MPointArray en tableau NumPy (N, 3)."""
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64)
+
+
+def read_shapes(pattern="C_*"):
+    """
+    Lit les CVs de toutes les courbes des contrôleurs via MFnNurbsCurve.
+
+    :return: Dictionnaire {contrôleur: [ {"points", "knots", "degree", "form"} par courbe ]}
+    """
+    shapes = {}
+    for ctrl in get_controls(pattern):
+        curves = []
+        for dag in get_curve_shapes(ctrl):
+            fn = om.MFnNurbsCurve(dag)
+            curves.append({
+                "points": points_to_numpy(fn.cvPositions(om.MSpace.kObject)),
+                "knots": np.array(fn.knots(), dtype=np.float64),
+                "degree": fn.degree,
+                "form": fn.form,
+            })
+        shapes[ctrl] = curves
+    return shapes
+
+
+def save_shapes(path, pattern="C_*"):
+    """
+    Sauvegarde les formes des contrôleurs dans un fichier `.npz` compressé.
+    Toutes les CVs sont concaténées dans un seul tableau, indexé par contrôleur et par courbe.
+
+    :param path: Chemin du fichier à écrire
+    :return: Nombre de contrôleurs sauvegardés
+    """
+    shapes = read_shapes(pattern)
+    names, indices, counts, knot_counts, degrees, forms, points, knots = [], [], [], [], [], [], [], []
+
+    for ctrl, curves in shapes.items():
+        for i, curve in enumerate(curves):
+            names.append(ctrl)
+            indices.append(i)
+            counts.append(len(curve["points"]))
+            knot_counts.append(len(curve["knots"]))
+            degrees.append(curve["degree"])
+            forms.append(curve["form"])
+            points.append(curve["points"])
+            knots.append(curve["knots"])
+
+    if not names:
+        cmds.warning("Aucun contrôleur à sauvegarder.")
+        return 0
+
+    np.savez_compressed(
+        path,
+        names=np.array(names),
+        indices=np.array(indices, dtype=np.int32),
+        counts=np.array(counts, dtype=np.int32),
+        knot_counts=np.array(knot_counts, dtype=np.int32),
+        degrees=np.array(degrees, dtype=np.int8),
+        forms=np.array(forms, dtype=np.int8),
+        points=np.concatenate(points).astype(np.float32),
+        knots=np.concatenate(knots),
+    )
+
+    print(f">> Formes de {len(shapes)} contrôleurs sauvegardées dans {path}.")
+    return len(shapes)
+
+
+def load_shapes(path):
+    """
+    Relit un fichier de formes.
+
+    :return: Dictionnaire {contrôleur: [ {"points", "knots", "degree", "form"} par courbe ]}
+    """
+    with np.load(path) as data:
+        point_splits = np.cumsum(data["counts"])[:-1]
+        knot_splits = np.cumsum(data["knot_counts"])[:-1]
+        points = np.split(data["points"].astype(np.float64), point_splits)
+        knots = np.split(data["knots"], knot_splits)
+
+        shapes = {}
+        for i, ctrl in enumerate(data["names"].tolist()):
+            shapes.setdefault(ctrl, []).append({
+                "points": points[i],
+                "knots": knots[i],
+                "degree": int(data["degrees"][i]),
+                "form": int(data["forms"][i]),
+            })
+    return shapes
+
+
+def restore_shapes(path):
+    """
+    Réapplique les formes sauvegardées sur les contrôleurs existants, en une passe.
+    Quand la topologie est identique, seules les CVs sont déplacées ; sinon les courbes
+    du contrôleur sont reconstruites à partir des données sauvegardées.
+
+    :param path: Chemin du fichier de formes
+    :return: Nombre de contrôleurs restaurés
+    """
+    try:
+        shapes = load_shapes(path)
+    except (OSError, KeyError, ValueError) as e:
+        cmds.warning(f"Erreur lors de la lecture du fichier de formes : {e}")
+        return 0
+
+    restored = 0
+    for ctrl, curves in shapes.items():
+        if not cmds.objExists(ctrl):
+            continue
+
+        dags = get_curve_shapes(ctrl)
+        same_topology = len(dags) == len(curves) and all(
+            om.MFnNurbsCurve(dag).numCVs == len(curve["points"]) for dag, curve in zip(dags, curves))
+
+        if same_topology:
+            # Un historique de construction (`makeNurbCircle`...) écraserait les CVs à la réévaluation
+            cmds.delete([dag.fullPathName() for dag in dags], constructionHistory=True)
+            for dag, curve in zip(dags, curves):
+                fn = om.MFnNurbsCurve(dag)
+                fn.setCVPositions(om.MPointArray(curve["points"].tolist()), om.MSpace.kObject)
+                fn.updateCurve()
+        else:
+            rebuild_curves(ctrl, dags, curves)
+
+        restored += 1
+
+    print(f">> Formes restaurées sur {restored} contrôleurs.")
+    return restored
+
+
+def rebuild_curves(ctrl, dags, curves):
+    """Remplace les courbes d'un contrôleur en conservant la couleur de la première."""
+    color = None
+    if dags:
+        shape = dags[0].fullPathName()
+        if cmds.getAttr(f"{shape}.overrideEnabled"):
+            color = cmds.getAttr(f"{shape}.overrideColor")
+        cmds.delete([dag.fullPathName() for dag in dags])
+
+    parent = om.MSelectionList().add(ctrl).getDependNode(0)
+    for i, curve in enumerate(curves):
+        shape = om.MFnNurbsCurve().create(
+            om.MPointArray(curve["points"].tolist()), om.MDoubleArray(curve["knots"].tolist()),
+            curve["degree"], curve["form"], False, True, parent)
+        name = cmds.rename(om.MFnDagNode(shape).fullPathName(), f"{ctrl}Shape{i + 1 if i else ''}")
+        if color is not None:
+            cmds.setAttr(f"{name}.overrideEnabled", 1)
+            cmds.setAttr(f"{name}.overrideColor", color)
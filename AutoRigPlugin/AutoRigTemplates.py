@@ -0,0 +1,227 @@
+import os
+import json
+
+
+# Dossiers de templates supplémentaires (séparés par os.pathsep), consultés avant ceux du plugin
+SEARCH_PATH_ENV = "AUTORIG_TEMPLATE_PATH"
+
+# Types de guides connus de `C_Curve`
+GUIDE_TYPES = {"Circle", "CubL", "SphL", "Grp"}
+
+# Fichiers lus : chemin -> (mtime, document)
+_DOCUMENTS = {}
+
+# Templates résolus : chemin -> (mtimes de la chaîne de bases, guides)
+_RESOLVED = {}
+
+
+###############################
+############################# Recherche des templates
+###############################
+
+
+def get_search_path():
+    """Retourne les dossiers de recherche, du plus prioritaire au dossier du plugin."""
+    paths = [p for p in os.environ.get(SEARCH_PATH_ENV, "").split(os.pathsep) if p]
+    paths.append(os.path.dirname(os.path.abspath(__file__)))
+    return paths
+
+
+def discover_templates():
+    """
+    Liste les templates de guides disponibles sur le chemin de recherche.
+    Les descriptions de rigs (`*_rig.json`) sont ignorées ; à nom égal, le premier dossier l'emporte.
+
+    :return: Dictionnaire {nom: chemin}
+    """
+    templates = {}
+    for directory in get_search_path():
+        if not os.path.isdir(directory):
+            continue
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith(".json") and not file_name.endswith("_rig.json"):
+                templates.setdefault(os.path.splitext(file_name)[0], os.path.join(directory, file_name))
+    return templates
+
+
+def find_template(template):
+    """Retourne le chemin d'un template à partir de son nom ou de son chemin."""
+    if os.path.isfile(template):
+        return os.path.abspath(template)
+    name = os.path.splitext(os.path.basename(template))[0]
+    path = discover_templates().get(name)
+    if not path:
+        raise FileNotFoundError(f"Template '{template}' introuvable dans {get_search_path()}")
+    return path
+
+
+###############################
+############################# Lecture et validation
+###############################
+
+
+def normalize_guide(guide):
+    """
+    Complète un guide avec les valeurs par défaut et remplace l'ancienne liste `hierarchy`
+    (tous les ancêtres) par le seul `parent`.
+    """
+    hierarchy = guide.get("hierarchy") or []
+    return {
+        "name": guide["name"],
+        "type": guide["type"],
+        "position": list(guide.get("position", [0, 0, 0])),
+        "orientation": list(guide.get("orientation", [0, 0, 0])),
+        "scale": list(guide.get("scale", [1, 1, 1])),
+        "color": guide.get("color"),
+        "parent": guide.get("parent", hierarchy[-1] if hierarchy else None),
+    }
+
+
+def read_document(path):
+    """Lit un fichier de template, mis en cache selon sa date de modification."""
+    mtime = os.path.getmtime(path)
+    cached = _DOCUMENTS.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r') as json_file:
+        data = json.load(json_file)
+
+    # Ancien format : liste plate de guides
+    if isinstance(data, list):
+        data = {"guides": data}
+
+    _DOCUMENTS[path] = (mtime, data)
+    return data
+
+
+def validate_guides(guides, name):
+    """Vérifie les noms, les types et les parents des guides d'un template."""
+    names = set()
+    for guide in guides:
+        if guide["name"] in names:
+            raise ValueError(f"{name} : guide '{guide['name']}' défini deux fois")
+        if guide["type"] not in GUIDE_TYPES:
+            raise ValueError(f"{name} : type inconnu '{guide['type']}' pour '{guide['name']}'")
+        names.add(guide["name"])
+
+    for guide in guides:
+        if guide["parent"] and guide["parent"] not in names:
+            raise ValueError(f"{name} : parent '{guide['parent']}' introuvable pour '{guide['name']}'")
+
+
+###############################
+############################# Variantes
+###############################
+
+
+def apply_overrides(guides, document):
+    """
+    Applique les surcharges d'une variante sur les guides de sa base :
+      - `scale` : facteur appliqué à toutes les positions,
+      - `offsets` : {guide: [dx, dy, dz]} appliqué au guide et à tous ses descendants,
+      - `overrides` : {guide: {champ: valeur}} remplace des champs,
+      - `remove` : guides supprimés (avec leurs descendants),
+      - `add` : nouveaux guides.
+    """
+    guides = [dict(g) for g in guides]
+    by_name = {g["name"]: g for g in guides}
+    children = {}
+    for g in guides:
+        children.setdefault(g["parent"], []).append(g["name"])
+
+    def descendants(name):
+        result = [name]
+        for child in children.get(name, []):
+            result += descendants(child)
+        return result
+
+    factor = document.get("scale")
+    if factor is not None:
+        for g in guides:
+            g["position"] = [v * factor for v in g["position"]]
+
+    for name, offset in document.get("offsets", {}).items():
+        for item in descendants(name):
+            by_name[item]["position"] = [v + o for v, o in zip(by_name[item]["position"], offset)]
+
+    for name, fields in document.get("overrides", {}).items():
+        by_name[name].update(fields)
+
+    removed = {item for name in document.get("remove", []) for item in descendants(name)}
+    guides = [g for g in guides if g["name"] not in removed]
+    guides += [normalize_guide(g) for g in document.get("add", [])]
+    return guides
+
+
+def resolve(path, chain=()):
+    """
+    Résout un template et sa chaîne de bases.
+
+    :return: (signature des mtimes de la chaîne, liste des guides)
+    """
+    if path in chain:
+        raise ValueError(f"Héritage circulaire entre templates : {' -> '.join(chain + (path,))}")
+
+    document = read_document(path)
+    signature = ((path, _DOCUMENTS[path][0]),)
+
+    if document.get("base"):
+        base_signature, guides = resolve(find_template(document["base"]), chain + (path,))
+        return base_signature + signature, apply_overrides(guides, document)
+
+    return signature, [normalize_guide(g) for g in document.get("guides", [])]
+
+
+def get_template(template):
+    """
+    Retourne les guides d'un template (nom ou chemin), base et surcharges résolues et validées.
+    Le résultat est mis en cache tant qu'aucun fichier de la chaîne n'est modifié ; il ne doit pas
+    être modifié par l'appelant.
+
+    :return: Liste de guides {"name", "type", "position", "orientation", "scale", "color", "parent"}
+    """
+    path = find_template(template)
+    cached = _RESOLVED.get(path)
+    if cached and all(os.path.getmtime(p) == mtime for p, mtime in cached[0]):
+        return cached[1]
+
+    signature, guides = resolve(path)
+    validate_guides(guides, os.path.basename(path))
+    _RESOLVED[path] = (signature, guides)
+    return guides
+
+
+###############################
+############################# Écriture
+###############################
+
+
+def save_template(path, guides, base=None):
+    """
+    Écrit un template compact. Avec une base, seules les différences sont enregistrées.
+
+    :param path: Chemin du fichier à écrire
+    :param guides: Liste de guides (format de `get_template`)
+    :param base: Nom du template de base, ou None pour un template complet
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    document = {"name": name}
+
+    if base:
+        base_guides = {g["name"]: g for g in get_template(base)}
+        current = {g["name"]: g for g in guides}
+        document["base"] = base
+        document["overrides"] = {
+            n: {k: v for k, v in g.items() if k != "name" and base_guides[n].get(k) != v}
+            for n, g in current.items() if n in base_guides and g != base_guides[n]
+        }
+        document["remove"] = [n for n in base_guides if n not in current]
+        document["add"] = [g for n, g in current.items() if n not in base_guides]
+    else:
+        document["guides"] = [normalize_guide(g) for g in guides]
+
+    with open(path, 'w') as json_file:
+        json.dump(document, json_file, indent=4)
+
+    print(f">> Template {name} écrit dans {path}.")
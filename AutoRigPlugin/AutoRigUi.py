@@ -1,38 +1,75 @@
 import sys
 import os
-sys.path.append("*****")
-from PySide2.QtGui import *
-from PySide2.QtCore import *
-from PySide2.QtWidgets import *
+import json
+import importlib
+from PySide2.QtCore import Qt
+from PySide2.QtWidgets import (QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QFrame,
+                               QLabel, QComboBox, QPushButton, QCheckBox, QSpinBox, QFileDialog)
 import maya.OpenMayaUI as mui
-import shiboken2
 import maya.cmds as cmds
-import AutoRigCore as arc  # Import des fonctions utilitaires
+from maya.app.general.mayaMixin import MayaQWidgetDockableMixin
 
-def get_maya_window():
-    """Récupère la fenêtre principale de Maya."""
-    main_window_ptr = mui.MQtUtil.mainWindow()
-    return shiboken2.wrapInstance(int(main_window_ptr), QWidget)
+# Dossier du plugin, nécessaire aux imports différés et à la restauration du dock
+if "__file__" in globals():
+    PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+    if PLUGIN_DIR not in sys.path:
+        sys.path.append(PLUGIN_DIR)
 
-class AutoRigUI(QDialog):
-    def __init__(self, parent=get_maya_window()):
+import AutoRigTemplates as art  # Registre des templates de guides (léger, utilisé à l'ouverture)
+
+# Nom de l'outil, de son workspaceControl et de l'optionVar qui conserve son état
+UI_NAME = "AutoRigUI"
+WORKSPACE_CONTROL = f"{UI_NAME}WorkspaceControl"
+STATE_VAR = f"{UI_NAME}_state"
+
+# Instance unique de l'outil
+_WINDOW = None
+
+
+def lazy_module(name):
+    """
+    Importe un module AutoRig au premier usage seulement : le cœur et les outils chargent NumPy
+    et l'API Maya, inutiles tant qu'aucune action n'est lancée.
+    """
+    return importlib.import_module(name)
+
+
+class AutoRigUI(MayaQWidgetDockableMixin, QWidget):
+    # Correspondance entre les libellés de l'interface et les membres du rig
+    MATCH_LIMBS = {
+        "Bras Gauche": ("Arm", "L"),
+        "Bras Droit": ("Arm", "R"),
+        "Jambe Gauche": ("Leg", "L"),
+        "Jambe Droite": ("Leg", "R"),
+    }
+
+    def __init__(self, parent=None):
         super().__init__(parent)
+        self.setObjectName(UI_NAME)
         self.setWindowTitle("AutoRig")
-        self.setFixedSize(400, 500)
-        self.setWindowFlags(Qt.Window)
+        self.setMinimumWidth(400)
 
         self.main_layout = QVBoxLayout(self)
 
+        # Pages de l'outil : sélection du rig, puis mode guide
+        self.stack = QStackedWidget()
+        self.main_layout.addWidget(self.stack)
+
         # Partie initiale de l'interface : Sélection du type de rig
         self.rig_type_label = QLabel("Type de Rig:")
         self.rig_type_combo = QComboBox()
         self.rig_type_combo.addItems(["Biped", "Quadruped", "Autre"])
         
+        # Templates de guides disponibles (variantes comprises)
+        self.template_combo = QComboBox()
+        self.template_combo.addItems(sorted(art.discover_templates()))
+
         self.create_button = QPushButton("Créer")
         
         top_layout = QHBoxLayout()
         top_layout.addWidget(self.rig_type_label)
         top_layout.addWidget(self.rig_type_combo)
+        top_layout.addWidget(self.template_combo)
         top_layout.addWidget(self.create_button)
         
         # Layout principal (sélection du type de rig)
@@ -59,10 +96,49 @@ class AutoRigUI(QDialog):
         tools_controls.addWidget(self.split_value)
 
         tools_layout.addLayout(tools_controls)
+
+        # Match et bake IK/FK sur la plage du time slider
+        self.match_limb_combo = QComboBox()
+        self.match_limb_combo.addItems(list(self.MATCH_LIMBS))
+        self.match_target_combo = QComboBox()
+        self.match_target_combo.addItems(["IK -> FK", "FK -> IK"])
+        self.match_button = QPushButton("Match && Bake")
+
+        match_controls = QHBoxLayout()
+        match_controls.addWidget(self.match_limb_combo)
+        match_controls.addWidget(self.match_target_combo)
+        match_controls.addWidget(self.match_button)
+
+        tools_layout.addLayout(match_controls)
+
+        # Formes des contrôleurs (réappliquées automatiquement après chaque AutoRig)
+        self.shapes_file = None
+        self.save_shapes_button = QPushButton("Sauver formes")
+        self.load_shapes_button = QPushButton("Charger formes")
+
+        shapes_controls = QHBoxLayout()
+        shapes_controls.addWidget(self.save_shapes_button)
+        shapes_controls.addWidget(self.load_shapes_button)
+
+        tools_layout.addLayout(shapes_controls)
+
+        # Rapport du graphe du rig et contrôle du budget de nodes
+        self.budget_check = QCheckBox("Budget de nodes")
+        self.report_button = QPushButton("Rapport")
+
+        report_controls = QHBoxLayout()
+        report_controls.addWidget(self.budget_check)
+        report_controls.addWidget(self.report_button)
+
+        tools_layout.addLayout(report_controls)
         tools_group.setLayout(tools_layout)
         self.initial_layout.addWidget(tools_group)
 
         self.split_button.clicked.connect(self.split_joint)
+        self.match_button.clicked.connect(self.match_bake)
+        self.save_shapes_button.clicked.connect(self.save_shapes)
+        self.load_shapes_button.clicked.connect(self.load_shapes)
+        self.report_button.clicked.connect(self.export_report)
         
         self.rig_type_combo.currentIndexChanged.connect(self.update_options)
 
@@ -80,17 +156,89 @@ class AutoRigUI(QDialog):
 
         self.autorig_button = QPushButton("AutoRig")
 
+        # Live link : garder le rig construit lié aux guides
+        self.live_link_check = QCheckBox("Live link")
+        self.update_button = QPushButton("Mettre à jour depuis les guides")
+
+        self.back_button = QPushButton("Retour")
+
         self.guide_layout.addWidget(self.guide_title)
         self.guide_layout.addWidget(self.separator)
         self.guide_layout.addWidget(self.guide_subtitle)
         self.guide_layout.addWidget(self.autorig_button)
+        self.guide_layout.addWidget(self.live_link_check)
+        self.guide_layout.addWidget(self.update_button)
+        self.guide_layout.addWidget(self.back_button)
+        self.guide_layout.addStretch()
 
         # Connecter les boutons
         self.create_button.clicked.connect(self.on_create_button_click)
         self.autorig_button.clicked.connect(self.on_autorig_button_click)
+        self.update_button.clicked.connect(self.update_from_guides)
+        self.back_button.clicked.connect(self.show_initial_mode)
 
         # Initialiser l'interface avec le layout de sélection de rig
-        self.main_layout.addLayout(self.initial_layout)
+        self.initial_widget = QWidget()
+        self.initial_widget.setLayout(self.initial_layout)
+        self.stack.addWidget(self.initial_widget)
+        self.stack.addWidget(self.guide_mode_widget)
+
+        self.load_state()
+
+    def get_state(self):
+        """Retourne l'état de l'interface sous forme sérialisable."""
+        return {
+            "rig_type": self.rig_type_combo.currentText(),
+            "template": self.template_combo.currentText(),
+            "squash": self.squash_check.isChecked(),
+            "squash_parts": [box.isChecked() for box in self.squash_options],
+            "bendable": self.bendable_check.isChecked(),
+            "bendable_parts": [box.isChecked() for box in self.bendable_options],
+            "symmetry": self.symmetry_check.isChecked(),
+            "symmetry_parts": [box.isChecked() for box in self.symmetry_options],
+            "split": self.split_value.value(),
+            "match_limb": self.match_limb_combo.currentText(),
+            "match_target": self.match_target_combo.currentIndex(),
+            "shapes_file": self.shapes_file,
+            "budget": self.budget_check.isChecked(),
+            "live_link": self.live_link_check.isChecked(),
+        }
+
+    def save_state(self):
+        """Enregistre l'état de l'interface dans une optionVar, conservée entre les sessions."""
+        cmds.optionVar(stringValue=(STATE_VAR, json.dumps(self.get_state())))
+
+    def load_state(self):
+        """Restaure l'état enregistré par `save_state`."""
+        if not cmds.optionVar(exists=STATE_VAR):
+            return
+        try:
+            state = json.loads(cmds.optionVar(query=STATE_VAR))
+        except (TypeError, ValueError):
+            return
+
+        for combo, key in ((self.rig_type_combo, "rig_type"), (self.template_combo, "template"),
+                           (self.match_limb_combo, "match_limb")):
+            index = combo.findText(state.get(key, ""))
+            if index >= 0:
+                combo.setCurrentIndex(index)
+
+        for check, boxes, key in ((self.squash_check, self.squash_options, "squash"),
+                                  (self.bendable_check, self.bendable_options, "bendable"),
+                                  (self.symmetry_check, self.symmetry_options, "symmetry")):
+            check.setChecked(state.get(key, False))
+            for box, checked in zip(boxes, state.get(f"{key}_parts", [])):
+                box.setChecked(checked)
+
+        self.split_value.setValue(state.get("split", self.split_value.value()))
+        self.match_target_combo.setCurrentIndex(state.get("match_target", 0))
+        self.shapes_file = state.get("shapes_file")
+        self.budget_check.setChecked(state.get("budget", False))
+        self.live_link_check.setChecked(state.get("live_link", False))
+
+    def hideEvent(self, event):
+        self.save_state()
+        super().hideEvent(event)
 
     def setup_options(self):
         """Crée les options dynamiques."""
@@ -160,6 +308,11 @@ class AutoRigUI(QDialog):
     def update_options(self):
         rig_type = self.rig_type_combo.currentText()
         self.options_widget.setVisible(rig_type == "Biped")
+
+        # Proposer le template de base du type de rig s'il existe
+        index = self.template_combo.findText(rig_type.lower())
+        if index >= 0:
+            self.template_combo.setCurrentIndex(index)
     
         if rig_type == "Quadruped":
             # Ajoute ici les options spécifiques aux quadrupèdes
@@ -177,36 +330,57 @@ class AutoRigUI(QDialog):
 
         joint = selected_joints[0]
         num_splits = self.split_value.value()
-        arc.split_joint(joint, num_splits)
+        lazy_module("AutoRigCore").split_joint(joint, num_splits)
+
+    def match_bake(self):
+        """Aligne et bake le membre choisi vers le mode cible sur la plage du time slider."""
+        limb, side = self.MATCH_LIMBS[self.match_limb_combo.currentText()]
+        target = "FK" if self.match_target_combo.currentIndex() == 0 else "IK"
+        lazy_module("AutoRigMatch").match_bake(limb, side, target)
+
+    def save_shapes(self):
+        """Sauvegarde les formes des contrôleurs de la scène."""
+        path, _ = QFileDialog.getSaveFileName(self, "Sauver les formes", "", "Formes (*.npz)")
+        if path and lazy_module("AutoRigShapes").save_shapes(path):
+            self.shapes_file = path
+
+    def load_shapes(self):
+        """Réapplique un fichier de formes sur les contrôleurs de la scène."""
+        path, _ = QFileDialog.getOpenFileName(self, "Charger les formes", "", "Formes (*.npz)")
+        if path and lazy_module("AutoRigShapes").restore_shapes(path):
+            self.shapes_file = path
+
+    def export_report(self):
+        """Analyse le rig de la scène, exporte le rapport et affiche les dépassements de budget."""
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter le rapport", "", "JSON (*.json)")
+        if not path:
+            return
+        arr = lazy_module("AutoRigReport")
+        report = arr.analyse_rig()
+        arr.export_report(report, path)
+        for violation in arr.check_budget(report):
+            cmds.warning(f"Budget de nodes dépassé : {violation}")
 
     def on_create_button_click(self):
-        rig_type = self.rig_type_combo.currentText()
-        arc.realiser(f"******{rig_type.lower()}.json")
+        lazy_module("AutoRigCore").realiser(self.template_combo.currentText())
         self.show_guide_mode()
 
     def show_guide_mode(self):
-        self.new_window = QDialog(parent=get_maya_window())
-        self.new_window.setWindowTitle("Mode Guide")
-        self.new_window.setFixedSize(400, 300)
-        self.new_window.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
-    
-        guide_layout = QVBoxLayout(self.new_window)
-    
-        # Nouveau bouton AutoRig pour cette fenêtre
-        autorig_button_guide = QPushButton("AutoRig")
-        autorig_button_guide.clicked.connect(self.on_autorig_button_click)
-    
-        
-    
-        guide_layout.addWidget(QLabel("Guide"))
-        guide_layout.addWidget(self.separator)
-        guide_layout.addWidget(QLabel("Déplacer les guides pour la convenance de votre personnage"))
-        guide_layout.addWidget(autorig_button_guide)
-    
-        self.new_window.show()
+        """Affiche le panneau du mode guide (toujours le même, créé avec l'outil)."""
+        self.stack.setCurrentWidget(self.guide_mode_widget)
+
+    def show_initial_mode(self):
+        """Revient au panneau de sélection du rig."""
+        self.stack.setCurrentWidget(self.initial_widget)
+
+    def update_from_guides(self):
+        """Reporte les guides modifiés sur le rig construit avec le live link."""
+        lazy_module("AutoRigLiveLink").update_from_guides()
 
     def on_autorig_button_click(self):
+        arc = lazy_module("AutoRigCore")
         rig_type = self.rig_type_combo.currentText()
+        self.save_state()
 
         options = {
             "squash": self.squash_check.isChecked(),
@@ -214,7 +388,10 @@ class AutoRigUI(QDialog):
             "bendable": self.bendable_check.isChecked(),
             "bendable_parts": [box.text() for box in self.bendable_options if box.isChecked()],
             "symmetry": self.symmetry_check.isChecked(),
-            "symmetry_parts": [box.text() for box in self.symmetry_options if box.isChecked()]
+            "symmetry_parts": [box.text() for box in self.symmetry_options if box.isChecked()],
+            "shapes_file": self.shapes_file,
+            "budget": self.budget_check.isChecked(),
+            "live_link": self.live_link_check.isChecked()
         }
 
         if rig_type == "Biped":
@@ -225,18 +402,46 @@ class AutoRigUI(QDialog):
             else:
                 cmds.warning("Fonction Crig_Qd non implémentée.")
         elif rig_type == "Autre":
+            rig_file, _ = QFileDialog.getOpenFileName(self, "Description du rig", "", "JSON (*.json)")
+            if not rig_file:
+                return
+            options["rig_file"] = rig_file
             if hasattr(arc, "Crig_Custom"):
                 arc.Crig_Custom(options)
             else:
                 cmds.warning("Fonction Crig_Custom non implémentée.")
 
 
+def show_ui():
+    """
+    Affiche l'outil AutoRig : une seule instance, dockable, conservée (avec son état)
+    quand elle est fermée puis rouverte.
+    """
+    global _WINDOW
+    if _WINDOW is None:
+        # workspaceControl restant d'une session précédente, sans instance Python associée
+        if cmds.workspaceControl(WORKSPACE_CONTROL, exists=True):
+            cmds.deleteUI(WORKSPACE_CONTROL)
+        _WINDOW = AutoRigUI()
+        _WINDOW.show(dockable=True, uiScript="import AutoRigUi; AutoRigUi.restore_ui()")
+    elif cmds.workspaceControl(WORKSPACE_CONTROL, exists=True):
+        cmds.workspaceControl(WORKSPACE_CONTROL, edit=True, restore=True)
+    else:
+        _WINDOW.show(dockable=True, uiScript="import AutoRigUi; AutoRigUi.restore_ui()")
+    return _WINDOW
+
+
+def restore_ui():
+    """Recrée l'outil dans son workspaceControl au redémarrage de Maya (appelé par `uiScript`)."""
+    global _WINDOW
+    if _WINDOW is None:
+        _WINDOW = AutoRigUI()
+    parent = mui.MQtUtil.getCurrentParent()
+    control = mui.MQtUtil.findControl(_WINDOW.objectName())
+    mui.MQtUtil.addWidgetToMayaLayout(int(control), int(parent))
+
+
 if __name__ == "__main__":
-    try:
-        for widget in get_maya_window().findChildren(AutoRigUI):
-            widget.close()
-    except:
-        pass
-
-    window = AutoRigUI()
-    window.show()
+    # Passer par le module importable pour partager l'instance unique avec `restore_ui`
+    import AutoRigUi
+    AutoRigUi.show_ui()